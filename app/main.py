@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import sys
+from datetime import datetime, time, timedelta
+from io import BytesIO
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 import pandas as pd
 import pydeck as pdk
@@ -12,8 +14,40 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from src.models.assignment_job import (
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_PENDING,
+    JOB_RUNNING,
+)
 from src.models.db import init_db
+from src.models.filter_set import canonical_filters_json, filters_hash
+from src.repositories.cached_repository import CachedProspectsRepository
 from src.repositories.prospects_repository import LocalFileRepository
+from src.services.assignment_index import assignment_index
+from src.services.assignment_job_service import (
+    has_active_jobs,
+    job_result,
+    list_assignment_jobs,
+    recover_interrupted_jobs,
+    submit_assignment_job,
+)
+from src.services.choropleth_service import (
+    MunicipalityFeatureTable,
+    build_choropleth_features,
+    build_feature_table,
+)
+from src.services.density_service import Viewport, prospect_density
+from src.services.distribution_service import (
+    REGION_FIRST,
+    ROUND_ROBIN,
+    WEIGHTED,
+    DistributionPlan,
+    ExecutiveSlot,
+    distribute_prospects,
+    executive_slots,
+    plan_distribution,
+)
 from src.services.executive_service import (
     create_executive,
     get_executive_map,
@@ -21,27 +55,73 @@ from src.services.executive_service import (
     set_executive_active,
     update_executive,
 )
+from src.services.export_service import (
+    EXPORT_ASSIGNMENTS,
+    EXPORT_DISTRIBUTION_LOGS,
+    EXPORT_FORMATS,
+    export_file_name,
+    export_records,
+    prospect_attributes,
+)
+from src.services.filter_cache import filter_cache_stats
+from src.services.filter_catalog_service import FilterCatalog, catalog_path
 from src.services.geojson_service import (
+    UF_IBGE_PREFIXES,
+    bbox_view_state,
     load_municipality_geojson,
-    normalize_municipality_code,
+    load_municipality_index,
+    select_geometry_level,
 )
 from src.services.prospect_service import (
     AssignmentResult,
+    PageCursor,
     ProspectFilters,
-    assign_prospects,
+    RecordPage,
+    current_owners,
+    facet_counts,
     filter_prospects,
+    get_prospect_catalog,
     list_assignments,
     list_distribution_logs,
 )
+from src.services.spatial_join_service import with_municipality_codes
+
+PARTITIONED_DATA_PATH = Path("data") / "prospects"
+DATA_PATH = (
+    PARTITIONED_DATA_PATH if PARTITIONED_DATA_PATH.is_dir() else Path("data") / "prospects.parquet"
+)
+FACET_CAPTION_TOP = 3
+ASSIGNMENT_JOB_POLL_SECONDS = 2
+JOB_STATUS_LABELS = {
+    JOB_PENDING: "na fila",
+    JOB_RUNNING: "em andamento",
+    JOB_COMPLETED: "concluída",
+    JOB_FAILED: "falhou",
+}
+DISTRIBUTION_STRATEGY_LABELS = {
+    ROUND_ROBIN: "Rodízio (partes iguais)",
+    WEIGHTED: "Proporcional à capacidade",
+    REGION_FIRST: "Região do executivo primeiro",
+}
+
+
+@st.cache_resource(show_spinner=False)
+def recover_interrupted_jobs_once() -> int:
+    """Marca os jobs órfãos como falhos uma vez por processo, não a cada rerun."""
+    return recover_interrupted_jobs()
 
-DATA_PATH = Path("data") / "prospects.parquet"
 
 st.set_page_config(page_title="aa-aquisicao", layout="wide")
 init_db()
+recover_interrupted_jobs_once()
 
 st.title("aa-aquisicao")
 
-repo = LocalFileRepository(DATA_PATH)
+source_repo = LocalFileRepository(DATA_PATH)
+repo = CachedProspectsRepository(
+    source_repo,
+    enrich=lambda df: with_municipality_codes(df, source_repo, PROJECT_ROOT / "data"),
+)
 
 UF_OPTIONS = [
     "AC",
@@ -74,61 +154,39 @@ UF_OPTIONS = [
 ]
 
 
-@st.cache_data(show_spinner="Carregando geometrias municipais do IBGE...")
-def fetch_municipality_geojson() -> dict[str, Any]:
+@st.cache_resource(show_spinner="Carregando geometrias municipais do IBGE...")
+def fetch_municipality_features(uf: str, level: str | None) -> MunicipalityFeatureTable:
     """Carrega as geometrias municipais do IBGE para o mapa.
 
     O GeoJSON deve estar previamente gerado em data/municipalities.geojson por
-    meio do script scripts/download_geojson.py.
+    meio do script scripts/download_geojson.py. Apenas o shard da UF é lido e
+    `level` escolhe a variante simplificada adequada ao zoom do mapa. A tabela
+    é compartilhada entre reruns e nunca é alterada.
     """
 
-    return load_municipality_geojson(PROJECT_ROOT / "data")
+    return build_feature_table(load_municipality_geojson(PROJECT_ROOT / "data", level=level, uf=uf))
 
 
-def build_municipality_layer(
-    geojson: dict[str, Any],
-    municipality_counts: pd.DataFrame,
-    municipality_column: str,
-) -> pdk.Layer:
-    counts_map = {
-        normalize_municipality_code(row[municipality_column]): int(row["prospects"])
-        for _, row in municipality_counts.iterrows()
-    }
-
-    max_prospects = max(counts_map.values()) if counts_map else 0
-    max_prospects = max_prospects or 1
-
-    for feature in geojson.get("features", []):
-        properties = feature.get("properties", {})
-        code = normalize_municipality_code(
-            feature.get("id")
-            or properties.get("CD_MUN")
-            or properties.get("CD_GEOCMU")
-            or properties.get("codarea")
-            or ""
-        )
-        prospects = counts_map.get(code, 0)
-
-        intensity = prospects / max_prospects
-        fill_color = [
-            230 - int(140 * intensity),
-            100 + int(60 * intensity),
-            80,
-            50 if prospects == 0 else 160,
-        ]
-
-        feature.setdefault("properties", {})
-        feature["properties"].update(
-            {
-                "prospects": prospects,
-                "codigo_ibge": code,
-                "fill_color": fill_color,
-            }
+def municipality_view_state(uf: str) -> pdk.ViewState:
+    try:
+        shard = load_municipality_index(PROJECT_ROOT / "data")["shards"].get(
+            UF_IBGE_PREFIXES[uf]
         )
+    except FileNotFoundError:
+        shard = None
+    if not shard:
+        return pdk.ViewState(latitude=-14.235, longitude=-51.9253, zoom=3.5)
+    latitude, longitude, zoom = bbox_view_state(shard["bbox"])
+    return pdk.ViewState(latitude=latitude, longitude=longitude, zoom=zoom)
+
 
+def build_municipality_layer(
+    feature_table: MunicipalityFeatureTable,
+    municipality_counts: pd.Series,
+) -> pdk.Layer:
     return pdk.Layer(
         "GeoJsonLayer",
-        geojson,
+        build_choropleth_features(feature_table, municipality_counts),
         pickable=True,
         stroked=False,
         filled=True,
@@ -139,17 +197,58 @@ def build_municipality_layer(
     )
 
 
-def render_filters(df: pd.DataFrame, default_unidade_federal: str | None) -> ProspectFilters:
+def build_density_layer(density_cells: pd.DataFrame) -> pdk.Layer:
+    return pdk.Layer(
+        "HeatmapLayer",
+        density_cells,
+        get_position=["lon", "lat"],
+        get_weight="count",
+        aggregation="SUM",
+        radius_pixels=30,
+    )
+
+
+def facet_caption(counts: pd.Series, selected: list[Any]) -> str:
+    """Resumo das contagens de uma coluna: opções escolhidas ou as mais frequentes."""
+    if selected:
+        return " · ".join(f"{value}: {int(counts.get(value, 0))}" for value in selected)
+    available = counts[counts > 0]
+    top = available.nlargest(FACET_CAPTION_TOP)
+    summary = " · ".join(f"{value}: {int(count)}" for value, count in top.items())
+    return f"{len(available)} opções com prospects — {summary}" if summary else "Sem prospects"
+
+
+def render_filters(
+    catalog: FilterCatalog,
+    default_unidade_federal: str | None,
+    count_facets: Callable[[ProspectFilters], dict[str, pd.Series]],
+    executive_map: dict[int, str],
+) -> ProspectFilters:
+    """Renderiza a sidebar; abaixo de cada filtro mostra quantos prospects cada opção deixaria.
+
+    As contagens ficam em placeholders preenchidos depois dos widgets, porque
+    dependem dos valores de todos os filtros. Elas não entram no `format_func`:
+    mudar o rótulo das opções recriaria o widget e perderia a seleção.
+    """
     st.sidebar.header("Filtros")
+    placeholders: dict[str, Any] = {}
+    # Opções restritas às que ocorrem na UF escolhida no topo da página.
+    scope = [default_unidade_federal] if default_unidade_federal else None
 
     def multi_select(
         label: str,
         column: str,
         default_values: list[str] | None = None,
+        options: list[Any] | None = None,
     ) -> list[str]:
-        options = sorted(df[column].dropna().unique())
         default_values = default_values or []
-        return st.sidebar.multiselect(label, options, default=default_values)
+        selected = st.sidebar.multiselect(
+            label,
+            catalog.options(column, scope) if options is None else options,
+            default=default_values,
+        )
+        placeholders[column] = st.sidebar.empty()
+        return selected
 
     cd_cnae5 = multi_select("CNAE 5", "cd_cnae5")
     cd_cnae = multi_select("CNAE", "cd_cnae")
@@ -157,43 +256,191 @@ def render_filters(df: pd.DataFrame, default_unidade_federal: str | None) -> Pro
     unidade_federal = multi_select(
         "UF",
         "unidade_federal",
-        [default_unidade_federal] if default_unidade_federal else None,
+        [default_unidade_federal] if default_unidade_federal else [],
+        options=UF_OPTIONS,
     )
     poligono = multi_select("Polígono", "poligono")
 
     pub_credito = multi_select("Pub. crédito", "pub_credito")
     rating = multi_select("Rating", "rating")
     porte = multi_select("Porte", "porte")
-    fl_potencial = st.sidebar.multiselect("Potencial", sorted(df["fl_potencial"].unique()))
-    fl_cnae_foco = st.sidebar.multiselect("CNAE foco", sorted(df["fl_cnae_foco"].unique()))
-    fl_pep = st.sidebar.multiselect("PEP", sorted(df["fl_pep"].unique()))
+    fl_potencial = multi_select("Potencial", "fl_potencial")
+    fl_cnae_foco = multi_select("CNAE foco", "fl_cnae_foco")
+    fl_pep = multi_select("PEP", "fl_pep")
     status_cadastral = multi_select("Status cadastral", "status_cadastral")
     segmento = multi_select("Segmento", "segmento")
     campanha = multi_select("Campanha", "campanha")
     funil = multi_select("Funil", "funil")
 
-    mes_ref_start = st.sidebar.text_input("Mês ref início (YYYY-MM-DD)", "")
-    mes_ref_end = st.sidebar.text_input("Mês ref fim (YYYY-MM-DD)", "")
-
-    return ProspectFilters(
-        cd_cnae5=cd_cnae5,
-        cd_cnae=cd_cnae,
-        faixa_fat=faixa_fat,
-        unidade_federal=unidade_federal,
-        poligono=poligono,
-        pub_credito=pub_credito,
-        rating=rating,
-        porte=porte,
-        fl_potencial=[int(x) for x in fl_potencial] if fl_potencial else None,
-        fl_cnae_foco=[int(x) for x in fl_cnae_foco] if fl_cnae_foco else None,
-        fl_pep=[int(x) for x in fl_pep] if fl_pep else None,
-        status_cadastral=status_cadastral,
-        segmento=segmento,
-        campanha=campanha,
-        funil=funil,
-        mes_ref_start=mes_ref_start or None,
-        mes_ref_end=mes_ref_end or None,
+    mes_ref_start = st.sidebar.text_input("Mês ref início (YYYY-MM ou YYYY-MM-DD)", "")
+    mes_ref_end = st.sidebar.text_input("Mês ref fim (YYYY-MM ou YYYY-MM-DD)", "")
+
+    only_unassigned = st.sidebar.checkbox("Somente prospects sem executivo")
+    exclude_executivo_ids = st.sidebar.multiselect(
+        "Excluir carteira de",
+        options=list(executive_map.keys()),
+        format_func=executive_map.get,
+        disabled=only_unassigned,
+    )
+
+    try:
+        filters = ProspectFilters(
+            cd_cnae5=cd_cnae5,
+            cd_cnae=cd_cnae,
+            faixa_fat=faixa_fat,
+            unidade_federal=unidade_federal,
+            poligono=poligono,
+            pub_credito=pub_credito,
+            rating=rating,
+            porte=porte,
+            fl_potencial=[int(x) for x in fl_potencial] if fl_potencial else None,
+            fl_cnae_foco=[int(x) for x in fl_cnae_foco] if fl_cnae_foco else None,
+            fl_pep=[int(x) for x in fl_pep] if fl_pep else None,
+            status_cadastral=status_cadastral,
+            segmento=segmento,
+            campanha=campanha,
+            funil=funil,
+            mes_ref_start=mes_ref_start or None,
+            mes_ref_end=mes_ref_end or None,
+            only_unassigned=only_unassigned,
+            exclude_executivo_ids=None if only_unassigned else exclude_executivo_ids,
+        )
+    except ValueError as exc:
+        st.error(str(exc))
+        st.stop()
+
+    for column, counts in count_facets(filters).items():
+        if column in placeholders:
+            placeholders[column].caption(facet_caption(counts, getattr(filters, column) or []))
+    return filters
+
+
+def render_assignment_jobs(executive_map: dict[int, str], polling: bool = False) -> None:
+    """Status das cargas recentes; reexecutado a cada poucos segundos enquanto há job ativo."""
+    if polling and not has_active_jobs():
+        # Sem jobs ativos, a página inteira é refeita para o fragmento parar de consultar.
+        st.rerun()
+    for job in list_assignment_jobs():
+        result: AssignmentResult = job_result(job)
+        executive = executive_map.get(job.executivo_id, str(job.executivo_id))
+        summary = (
+            f"Carga #{job.id} ({executive}) — {JOB_STATUS_LABELS[job.status]}: "
+            f"{result.total}/{job.total} | Novos: {result.assigned} | "
+            f"Reatribuições: {result.overwritten} | Ignorados: {result.skipped_same_exec}"
+        )
+        if job.status == JOB_FAILED:
+            st.error(f"{summary}\n\n{job.error}")
+        elif job.status == JOB_COMPLETED:
+            st.success(summary)
+        else:
+            st.progress(result.total / job.total if job.total else 0.0, text=summary)
+
+
+def cached_distribution_plan(
+    filters: ProspectFilters,
+    prospects: pd.DataFrame,
+    slots: list[ExecutiveSlot],
+    strategy: str,
+) -> DistributionPlan:
+    """Plano da sessão, refeito só quando filtros, snapshot, executivos ou capacidades mudam."""
+    key = (
+        filters_hash(canonical_filters_json(filters.__dict__)),
+        repo.snapshot().version,
+        # A carteira só altera os prospects filtrados quando há filtro por executivo.
+        assignment_index().version if filters.uses_assignments else None,
+        strategy,
+        tuple(slots),
     )
+    cached = st.session_state.get("distribution_plan")
+    if cached is None or cached[0] != key:
+        cached = key, plan_distribution(prospects, slots, strategy)
+        st.session_state["distribution_plan"] = cached
+    return cached[1]
+
+
+def executive_labels(executive_ids: pd.Series, executive_map: dict[int, str]) -> pd.Series:
+    return executive_ids.map(executive_map).fillna(executive_ids.astype(str))
+
+
+def render_date_range(key: str) -> tuple[datetime | None, datetime | None]:
+    selected = st.date_input("Período", value=(), key=f"{key}_period", format="YYYY-MM-DD")
+    if len(selected) != 2:
+        return None, None
+    start_date, end_date = selected
+    return (
+        datetime.combine(start_date, time.min),
+        datetime.combine(end_date + timedelta(days=1), time.min),
+    )
+
+
+def render_export(
+    kind: str,
+    executive_map: dict[int, str],
+    executivo_id: int | None,
+    start: datetime | None,
+    end: datetime | None,
+) -> None:
+    """Gera o arquivo completo do filtro sob demanda e oferece o download."""
+    state_key = f"{kind}_export"
+    col_format, col_generate, col_download = st.columns([1, 1, 2])
+    fmt = col_format.selectbox("Formato", EXPORT_FORMATS, key=f"{kind}_export_format")
+    params = (fmt, executivo_id, start, end)
+    if col_generate.button("Gerar arquivo", key=f"{kind}_export_generate"):
+        buffer = BytesIO()
+        rows = export_records(
+            kind,
+            buffer,
+            fmt,
+            repo=repo,
+            executive_map=executive_map,
+            executivo_id=executivo_id,
+            start=start,
+            end=end,
+        )
+        st.session_state[state_key] = (params, export_file_name(kind, fmt, executivo_id), buffer)
+        col_generate.caption(f"{rows} linhas")
+
+    exported = st.session_state.get(state_key)
+    if exported and exported[0] == params:
+        _, file_name, buffer = exported
+        col_download.download_button(
+            f"Baixar {file_name}",
+            data=buffer.getvalue(),
+            file_name=file_name,
+            key=f"{kind}_export_download",
+        )
+
+
+def render_paginated(
+    key: str,
+    query_signature: tuple[Any, ...],
+    fetch: Callable[[PageCursor | None], RecordPage],
+) -> RecordPage:
+    """Navega por páginas via keyset, guardando os cursores em `st.session_state`."""
+    state_key = f"{key}_cursors"
+    if st.session_state.get(f"{key}_signature") != query_signature:
+        st.session_state[f"{key}_signature"] = query_signature
+        st.session_state[state_key] = [None]
+    cursors: list[PageCursor | None] = st.session_state[state_key]
+
+    page = fetch(cursors[-1])
+
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    col_prev.button(
+        "Página anterior",
+        key=f"{key}_prev",
+        disabled=len(cursors) == 1,
+        on_click=cursors.pop,
+    )
+    col_info.caption(f"Página {len(cursors)}")
+    col_next.button(
+        "Próxima página",
+        key=f"{key}_next",
+        disabled=page.next_cursor is None,
+        on_click=cursors.append,
+        args=(page.next_cursor,),
+    )
+    return page
 
 
 st.header("Distribuir prospects")
@@ -204,51 +451,92 @@ if selected_state == "Selecione...":
     st.stop()
 
 try:
-    base_df = repo.load()
+    available_columns = repo.column_names()
+    catalog = get_prospect_catalog(repo.snapshot(), catalog_path(DATA_PATH))
 except FileNotFoundError:
-    st.error("Dataset não encontrado. Gere o arquivo em data/prospects.parquet")
+    st.error(
+        "Dataset não encontrado. Gere o arquivo em data/prospects.parquet "
+        "ou o diretório particionado data/prospects/"
+    )
     st.stop()
 
-filters = render_filters(base_df, selected_state)
+st.sidebar.caption(f"Cache de prospects: {repo.memory_usage() / 1024 ** 2:.1f} MB")
+filter_stats = filter_cache_stats()
+st.sidebar.caption(
+    f"Cache de filtros: {filter_stats.hits} acertos, {filter_stats.misses} falhas, "
+    f"{filter_stats.entries} entradas ({filter_stats.bytes / 1024 ** 2:.1f} MB)"
+)
+owner_map = get_executive_map(list_executives(active_only=False))
+filters = render_filters(
+    catalog, selected_state, lambda current: facet_counts(repo, current), owner_map
+)
 filtered_df = filter_prospects(repo, filters)
+filtered_owners = current_owners(repo, filtered_df)
 
-col1, col2, col3 = st.columns(3)
+col1, col2, col3, col4 = st.columns(4)
 col1.metric("Prospects", len(filtered_df))
 col2.metric("UFs", filtered_df["unidade_federal"].nunique())
 col3.metric("Polígonos", filtered_df["poligono"].nunique())
+col4.metric(
+    "Já atribuídos",
+    filtered_df.loc[filtered_owners.notna().to_numpy(), "cnpj_cpf"].nunique(),
+)
 
 st.subheader("Preview")
 page_size = st.selectbox("Linhas por página", [25, 50, 100], index=0)
 page = st.number_input("Página", min_value=1, value=1)
 start = (page - 1) * page_size
 end = start + page_size
-st.dataframe(filtered_df.iloc[start:end])
+page_owners = filtered_owners.iloc[start:end]
+st.dataframe(
+    filtered_df.iloc[start:end].assign(
+        executivo_atual=executive_labels(page_owners, owner_map).where(page_owners.notna())
+    )
+)
 
 st.subheader("Mapa")
+map_layer = st.radio("Camada", ["Municípios", "Densidade"], horizontal=True)
 municipality_column: str | None = None
 for candidate in ("municipio_ibge", "poligono"):
     if candidate in filtered_df.columns:
         municipality_column = candidate
         break
 
-if not municipality_column:
+if map_layer == "Densidade":
+    if not {"lat", "long"} <= set(available_columns):
+        st.info("O dataset não possui as colunas lat/long para o mapa de densidade.")
+    else:
+        view_state = municipality_view_state(selected_state)
+        density_cells = prospect_density(
+            repo,
+            filters,
+            view_state.zoom,
+            Viewport.from_view_state(view_state.latitude, view_state.longitude, view_state.zoom),
+        )
+        st.pydeck_chart(
+            pdk.Deck(layers=[build_density_layer(density_cells)], initial_view_state=view_state)
+        )
+        st.caption(f"Células no mapa: {len(density_cells)}")
+elif not municipality_column:
     st.info("Nenhuma coluna de município encontrada no dataset para construir o mapa.")
 else:
-    municipality_counts = (
-        filtered_df.dropna(subset=[municipality_column])
-        .assign(**{municipality_column: lambda df: df[municipality_column].astype(str)})
-        .groupby(municipality_column)
-        .size()
-        .reset_index(name="prospects")
-    )
+    if municipality_column != "municipio_ibge" and {"lat", "long"} <= set(available_columns):
+        st.caption(
+            "Mapa por polígono: rode `python scripts/join_municipalities.py` para agrupar por "
+            "município IBGE a partir de lat/long."
+        )
+    municipality_counts = filtered_df[municipality_column].dropna().value_counts(sort=False)
+    municipality_counts = municipality_counts[municipality_counts > 0]
 
     if municipality_counts.empty:
         st.info("Nenhum município encontrado com os filtros atuais.")
     else:
         try:
-            geojson = fetch_municipality_geojson()
-            layer = build_municipality_layer(geojson, municipality_counts, municipality_column)
-            view_state = pdk.ViewState(latitude=-14.235, longitude=-51.9253, zoom=3.5)
+            view_state = municipality_view_state(selected_state)
+            feature_table = fetch_municipality_features(
+                selected_state, select_geometry_level(view_state.zoom)
+            )
+            layer = build_municipality_layer(feature_table, municipality_counts)
 
             st.pydeck_chart(
                 pdk.Deck(
@@ -276,9 +564,64 @@ selected_exec_id = st.selectbox(
 
 if st.button("Carregar para executivo"):
     prospect_ids = filtered_df["cnpj_cpf"].dropna().astype(str).tolist()
-    result: AssignmentResult = assign_prospects(selected_exec_id, prospect_ids, filters)
+    job_id = submit_assignment_job(selected_exec_id, prospect_ids, filters)
+    st.success(f"Carga #{job_id} enviada para processamento.")
+
+if list_assignment_jobs(limit=1):
+    polling = has_active_jobs()
+    st.fragment(run_every=ASSIGNMENT_JOB_POLL_SECONDS if polling else None)(
+        render_assignment_jobs
+    )(executive_map, polling)
+
+st.subheader("Distribuir entre executivos")
+distribution_exec_ids = st.multiselect(
+    "Executivos",
+    options=list(executive_map.keys()),
+    default=list(executive_map.keys()),
+    format_func=executive_map.get,
+    key="distribution_execs",
+)
+distribution_strategy = st.radio(
+    "Estratégia",
+    options=list(DISTRIBUTION_STRATEGY_LABELS.keys()),
+    format_func=DISTRIBUTION_STRATEGY_LABELS.get,
+    horizontal=True,
+)
+capacities: dict[int, int | None] = {}
+with st.expander("Capacidade por executivo (0 = sem limite)"):
+    for exec_id in distribution_exec_ids:
+        capacity = st.number_input(
+            executive_map[exec_id],
+            min_value=0,
+            value=0,
+            step=100,
+            key=f"distribution_capacity_{exec_id}",
+        )
+        capacities[exec_id] = int(capacity) or None
+
+distribution_execs = [
+    executive for executive in executives if executive.id in distribution_exec_ids
+]
+plan = cached_distribution_plan(
+    filters, filtered_df, executive_slots(distribution_execs, capacities), distribution_strategy
+)
+plan_counts = plan.counts()
+st.dataframe(
+    pd.DataFrame(
+        {
+            "Executivo": executive_labels(plan_counts.index.to_series(), executive_map),
+            "Prospects": plan_counts.to_numpy(),
+        }
+    ),
+    hide_index=True,
+)
+if plan.unallocated:
+    st.warning(f"{plan.unallocated} prospects ficarão sem executivo (capacidade esgotada).")
+
+if st.button("Distribuir prospects", disabled=plan.allocation.empty):
+    result = distribute_prospects(plan, filters)
     st.success(
-        f"Total: {result.total} | Novos: {result.assigned} | "
+        f"Distribuídos: {result.total} | Novos: {result.assigned} | "
         f"Reatribuições: {result.overwritten} | Ignorados: {result.skipped_same_exec}"
     )
 
@@ -296,23 +639,31 @@ with tab_logs:
         options=[None] + list(executive_map_all.keys()),
         format_func=lambda x: executive_map_all.get(x, "Todos"),
     )
+    log_start, log_end = render_date_range("logs")
+    render_export(
+        EXPORT_DISTRIBUTION_LOGS, executive_map_all, selected_log_exec, log_start, log_end
+    )
 
-    logs = list_distribution_logs(selected_log_exec)
-    if logs:
+    logs_page = render_paginated(
+        "logs",
+        (selected_log_exec, log_start, log_end),
+        lambda cursor: list_distribution_logs(
+            selected_log_exec, after=cursor, start=log_start, end=log_end
+        ),
+    )
+    logs = logs_page.frame
+    if not logs.empty:
         logs_df = pd.DataFrame(
-            [
-                {
-                    "Data": log.assigned_at.strftime("%Y-%m-%d %H:%M"),
-                    "Executivo atual": executive_map_all.get(log.executivo_id, log.executivo_id),
-                    "Executivo anterior": executive_map_all.get(log.previous_executivo_id, "-")
-                    if log.previous_executivo_id
-                    else "-",
-                    "CNPJ/CPF": log.cnpj_cpf,
-                    "Mês ref": log.mes_ref or "-",
-                    "Filtros": log.filters_json,
-                }
-                for log in logs
-            ]
+            {
+                "Data": logs["assigned_at"].dt.strftime("%Y-%m-%d %H:%M"),
+                "Executivo atual": executive_labels(logs["executivo_id"], executive_map_all),
+                "Executivo anterior": logs["previous_executivo_id"]
+                .map(executive_map_all)
+                .fillna("-"),
+                "CNPJ/CPF": logs["cnpj_cpf"],
+                "Mês ref": logs["mes_ref"].fillna("-"),
+                "Filtros": logs["filters_json"],
+            }
         )
         st.dataframe(logs_df, use_container_width=True, height=400)
     else:
@@ -325,39 +676,39 @@ with tab_assignments:
         format_func=lambda x: executive_map_all.get(x, "Todos"),
         key="assignment_exec_selector",
     )
+    assignment_start, assignment_end = render_date_range("assignments")
+    render_export(
+        EXPORT_ASSIGNMENTS,
+        executive_map_all,
+        selected_assignment_exec,
+        assignment_start,
+        assignment_end,
+    )
 
-    assignments = list_assignments(selected_assignment_exec)
-    if assignments:
+    assignments_page = render_paginated(
+        "assignments",
+        (selected_assignment_exec, assignment_start, assignment_end),
+        lambda cursor: list_assignments(
+            selected_assignment_exec, after=cursor, start=assignment_start, end=assignment_end
+        ),
+    )
+    assignments = assignments_page.frame
+    if not assignments.empty:
         assignments_df = pd.DataFrame(
-            [
-                {
-                    "CNPJ/CPF": assignment.cnpj_cpf,
-                    "Executivo": executive_map_all.get(assignment.executivo_id, assignment.executivo_id),
-                    "Carregado em": assignment.assigned_at.strftime("%Y-%m-%d %H:%M"),
-                    "Mês ref": assignment.mes_ref or "-",
-                    "Filtros": assignment.filters_json,
-                }
-                for assignment in assignments
-            ]
+            {
+                "CNPJ/CPF": assignments["cnpj_cpf"],
+                "Executivo": executive_labels(assignments["executivo_id"], executive_map_all),
+                "Carregado em": assignments["assigned_at"].dt.strftime("%Y-%m-%d %H:%M"),
+                "Mês ref": assignments["mes_ref"].fillna("-"),
+                "Filtros": assignments["filters_json"],
+            }
         )
 
-        base_columns = [
-            col
-            for col in [
-                "razao_social",
-                "nome_fantasia",
-                "nm_razao_social",
-                "nm_fantasia",
-                "segmento",
-                "unidade_federal",
-            ]
-            if col in base_df.columns
-        ]
-        if base_columns:
-            extra_info = base_df[["cnpj_cpf", *base_columns]].drop_duplicates("cnpj_cpf")
-            assignments_df = assignments_df.merge(
-                extra_info, left_on="CNPJ/CPF", right_on="cnpj_cpf", how="left"
-            ).drop(columns=["cnpj_cpf"])
+        # Atributos por `cnpj_cpf` derivados uma vez por snapshot; só a página é consultada.
+        attributes = prospect_attributes(repo)
+        if attributes is not None:
+            extra_info = attributes.enrich(assignments[["cnpj_cpf"]]).drop(columns=["cnpj_cpf"])
+            assignments_df = pd.concat([assignments_df, extra_info], axis=1)
 
         st.dataframe(assignments_df, use_container_width=True, height=400)
     else:
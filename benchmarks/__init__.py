@@ -0,0 +1,4 @@
+"""Benchmarks de desempenho do aa-aquisicao.
+
+Executar com `python -m benchmarks.run --rows 50000 1000000 --output resultados.json`.
+"""
@@ -0,0 +1,102 @@
+"""Dados sintéticos dos benchmarks.
+
+Os prospects vêm de `scripts/generate_dummy_data.py` e ficam em cache em
+`<workdir>/datasets/prospects_<linhas>.parquet`, gerados em blocos paralelos
+sem manter o dataset inteiro em memória. Os logs de distribuição e as geometrias
+municipais são sintéticos e gerados a cada execução.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import ModuleType
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, insert, select
+
+from benchmarks.harness import PROJECT_ROOT
+from src.models.assignment import DistributionLog, ProspectAssignment
+from src.models.db import get_session
+from src.models.executive import Executive
+from src.services.choropleth_service import MunicipalityFeatureTable
+
+LOG_INSERT_CHUNK_ROWS = 50_000
+BENCHMARK_EXECUTIVES = 20
+
+
+def load_dummy_generator() -> ModuleType:
+    path = PROJECT_ROOT / "scripts" / "generate_dummy_data.py"
+    spec = importlib.util.spec_from_file_location("generate_dummy_data", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def ensure_dataset(work_dir: Path, rows: int) -> Path:
+    """Parquet com `rows` prospects dummy, reaproveitado entre execuções."""
+    path = work_dir / "datasets" / f"prospects_{rows}.parquet"
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    generator = load_dummy_generator()
+    generator.write_parquet(generator.iter_chunks(rows, workers=os.cpu_count() or 1), path)
+    return path
+
+
+def ensure_executives(count: int = BENCHMARK_EXECUTIVES) -> list[int]:
+    stmt = select(Executive.id).order_by(Executive.id).limit(count)
+    with next(get_session()) as session:
+        existing = len(session.execute(stmt).all())
+        for index in range(existing, count):
+            session.add(Executive(nome=f"Benchmark {index}", email=f"bench{index}@example.com"))
+        session.commit()
+        return list(session.execute(stmt).scalars())
+
+
+def clear_assignments() -> None:
+    with next(get_session()) as session:
+        session.execute(delete(ProspectAssignment))
+        session.execute(delete(DistributionLog))
+        session.commit()
+
+
+def seed_distribution_logs(rows: int, executive_ids: list[int], seed: int = 42) -> None:
+    """Preenche `distribution_logs` com `rows` registros espalhados em um ano."""
+    rng = np.random.default_rng(seed)
+    first_day = datetime(2024, 1, 1)
+    with next(get_session()) as session:
+        for start in range(0, rows, LOG_INSERT_CHUNK_ROWS):
+            size = min(LOG_INSERT_CHUNK_ROWS, rows - start)
+            offsets = np.sort(rng.integers(0, 365 * 24 * 3600, size))
+            executives = rng.choice(executive_ids, size)
+            session.execute(
+                insert(DistributionLog),
+                [
+                    {
+                        "cnpj_cpf": f"{start + index:014d}",
+                        "executivo_id": int(executive),
+                        "previous_executivo_id": None,
+                        "assigned_at": first_day + timedelta(seconds=int(offset)),
+                        "mes_ref": "2024-01-01",
+                    }
+                    for index, (executive, offset) in enumerate(zip(executives, offsets))
+                ],
+            )
+            session.commit()
+
+
+def synthetic_feature_table(count: int) -> MunicipalityFeatureTable:
+    """`count` municípios quadrados em grade, com códigos IBGE fictícios de 7 dígitos."""
+    side = int(np.ceil(np.sqrt(count)))
+    geometries = []
+    for index in range(count):
+        x, y = -74.0 + (index % side) * 0.4, -33.0 + (index // side) * 0.4
+        ring = [[x, y], [x + 0.4, y], [x + 0.4, y + 0.4], [x, y + 0.4], [x, y]]
+        geometries.append({"type": "Polygon", "coordinates": [ring]})
+    codes = pd.Index([f"{1100000 + index:07d}" for index in range(count)])
+    return MunicipalityFeatureTable(codes=codes, geometries=tuple(geometries))
@@ -0,0 +1,109 @@
+"""Medição de tempo e gravação dos resultados em JSON."""
+
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    params: dict[str, Any]
+    seconds: list[float]
+    rows: int | None = None
+
+    @property
+    def best(self) -> float:
+        return min(self.seconds)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "min": self.best,
+            "median": statistics.median(self.seconds),
+            "max": max(self.seconds),
+        }
+
+
+@dataclass
+class BenchmarkRun:
+    results: list[BenchmarkResult] = field(default_factory=list)
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+    def measure(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        repeat: int,
+        setup: Callable[[], Any] | None = None,
+        **params: Any,
+    ) -> BenchmarkResult:
+        """Executa `func` `repeat` vezes (com `setup` fora do tempo) e guarda os tempos.
+
+        Se `func` devolve algo com `len`, o tamanho entra no resultado como `rows`.
+        """
+        seconds: list[float] = []
+        rows = None
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            value = func()
+            seconds.append(time.perf_counter() - start)
+            if hasattr(value, "__len__"):
+                rows = len(value)
+        result = BenchmarkResult(name=name, params=params, seconds=seconds, rows=rows)
+        self.results.append(result)
+        details = ", ".join(f"{key}={value}" for key, value in params.items())
+        print(f"{name} [{details}]: {result.best:.4f}s (min de {repeat})")
+        return result
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "environment": environment(),
+            "results": [result.summary() for result in self.results],
+        }
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_json(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _git_commit() -> str | None:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def environment() -> dict[str, Any]:
+    import numpy
+    import pandas
+    import pyarrow
+
+    return {
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "pyarrow": pyarrow.__version__,
+    }
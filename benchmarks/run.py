@@ -0,0 +1,67 @@
+"""Executa os benchmarks e grava os tempos em JSON.
+
+Os datasets em cache e um banco SQLite próprio ficam em `--workdir`, sem tocar
+no banco do app. Exemplo, a partir da raiz do projeto:
+
+    python -m benchmarks.run --rows 50000 1000000 --assign-sizes 1000 50000 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.harness import PROJECT_ROOT
+from benchmarks.suite import run_benchmarks
+
+DEFAULT_ROWS = (50_000,)
+DEFAULT_ASSIGN_SIZES = (1_000, 50_000, 500_000)
+DEFAULT_LOG_ROWS = 1_000_000
+DEFAULT_REPEAT = 3
+BENCHMARK_GROUPS = ("load", "filter", "assign", "logs", "choropleth")
+WORK_DIR = PROJECT_ROOT / "benchmarks" / "work"
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho do aa-aquisicao")
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=list(DEFAULT_ROWS), help="Tamanhos do dataset"
+    )
+    parser.add_argument(
+        "--assign-sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_ASSIGN_SIZES),
+        help="Quantidades de ids em assign_prospects",
+    )
+    parser.add_argument(
+        "--log-rows", type=int, default=DEFAULT_LOG_ROWS, help="Linhas em distribution_logs"
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--only", choices=BENCHMARK_GROUPS, nargs="+", default=None, help="Grupos a executar"
+    )
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=WORK_DIR,
+        help="Datasets em cache e banco SQLite dos benchmarks",
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Arquivo JSON de resultados")
+    args = parser.parse_args()
+
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    output = output.resolve()
+    args.only = args.only or list(BENCHMARK_GROUPS)
+
+    work_dir = args.workdir.resolve()
+    work_dir.mkdir(parents=True, exist_ok=True)
+    run = run_benchmarks(args, work_dir, work_dir / "db" / "app.db")
+    run.write(output)
+    print(f"Resultados gravados em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Casos de benchmark: leitura, filtros, cargas, logs e mapa coroplético."""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import (
+    clear_assignments,
+    ensure_dataset,
+    ensure_executives,
+    seed_distribution_logs,
+    synthetic_feature_table,
+)
+from benchmarks.harness import BenchmarkRun
+from src.models import db
+from src.repositories.cached_repository import CachedProspectsRepository
+from src.repositories.prospects_repository import LocalFileRepository
+from src.services.choropleth_service import build_choropleth_features
+from src.services.filter_cache import clear_filter_cache
+from src.services.prospect_service import (
+    ProspectFilters,
+    assign_prospects,
+    filter_prospects,
+    list_distribution_logs,
+)
+
+MUNICIPALITY_COUNT = 5_570
+LOAD_PROJECTION = ["cnpj_cpf", "unidade_federal", "segmento", "mes_ref"]
+
+
+def filter_mixes(df: pd.DataFrame) -> dict[str, ProspectFilters]:
+    """Combinações de filtro representativas do uso da sidebar."""
+    cnae5 = df["cd_cnae5"].drop_duplicates().head(50).tolist()
+    return {
+        "uf": ProspectFilters(unidade_federal=["SP"]),
+        "uf_segmento_porte": ProspectFilters(
+            unidade_federal=["SP"], segmento=["Varejo", "Tech"], porte=["ME", "EPP"]
+        ),
+        "cnae5_50": ProspectFilters(cd_cnae5=cnae5),
+        "mes_ref": ProspectFilters(mes_ref_start="2024-01", mes_ref_end="2024-06"),
+        "combinado": ProspectFilters(
+            unidade_federal=["SP", "RJ"],
+            rating=["A", "B"],
+            fl_potencial=[1],
+            mes_ref_start="2024-01",
+            mes_ref_end="2024-12",
+        ),
+    }
+
+
+def bench_load(run: BenchmarkRun, path: Path, rows: int, repeat: int) -> None:
+    repo = LocalFileRepository(path)
+    run.measure("load", repo.load, repeat, rows=rows, columns="todas")
+    run.measure(
+        "load", lambda: repo.load(columns=LOAD_PROJECTION), repeat, rows=rows, columns="projecao"
+    )
+
+
+def bench_filter(run: BenchmarkRun, path: Path, rows: int, repeat: int) -> None:
+    file_repo = LocalFileRepository(path)
+    cached_repo = CachedProspectsRepository(file_repo)
+    snapshot = cached_repo.snapshot()
+    for mix, filters in filter_mixes(snapshot.frame).items():
+        run.measure(
+            "filter_prospects",
+            lambda: filter_prospects(file_repo, filters),
+            repeat,
+            rows=rows,
+            mix=mix,
+            repo="arquivo",
+        )
+        # Primeira consulta do combo: índice pronto, cache de resultados vazio.
+        run.measure(
+            "filter_prospects",
+            lambda: filter_prospects(cached_repo, filters),
+            repeat,
+            setup=clear_filter_cache,
+            rows=rows,
+            mix=mix,
+            repo="cache",
+        )
+        run.measure(
+            "filter_prospects",
+            lambda: filter_prospects(cached_repo, filters),
+            repeat,
+            rows=rows,
+            mix=mix,
+            repo="cache_quente",
+        )
+
+
+def bench_assign(
+    run: BenchmarkRun, prospect_ids: list[str], sizes: list[int], repeat: int
+) -> None:
+    executive_id = ensure_executives()[0]
+    filters = ProspectFilters(unidade_federal=["SP"])
+    for size in sizes:
+        if size > len(prospect_ids):
+            print(f"assign_prospects [{size}]: ignorado, o dataset tem {len(prospect_ids)} ids")
+            continue
+        ids = prospect_ids[:size]
+        run.measure(
+            "assign_prospects",
+            lambda: assign_prospects(executive_id, ids, filters),
+            repeat,
+            setup=clear_assignments,
+            ids=size,
+        )
+    clear_assignments()
+
+
+def bench_logs(run: BenchmarkRun, log_rows: int, repeat: int) -> None:
+    clear_assignments()
+    executive_ids = ensure_executives()
+    seed_distribution_logs(log_rows, executive_ids)
+
+    cursor = None
+    for _ in range(20):
+        cursor = list_distribution_logs(after=cursor).next_cursor
+    start = datetime(2024, 6, 1)
+    cases: dict[str, Any] = {
+        "primeira_pagina": lambda: list_distribution_logs().frame,
+        "executivo": lambda: list_distribution_logs(executive_ids[0]).frame,
+        "pagina_21": lambda: list_distribution_logs(after=cursor).frame,
+        "periodo": lambda: list_distribution_logs(
+            start=start, end=start + timedelta(days=30)
+        ).frame,
+    }
+    for case, func in cases.items():
+        run.measure("list_distribution_logs", func, repeat, log_rows=log_rows, case=case)
+    clear_assignments()
+
+
+def bench_choropleth(run: BenchmarkRun, repeat: int) -> None:
+    """Parte de dados de `build_municipality_layer` (app/main.py): feições e cores."""
+    table = synthetic_feature_table(MUNICIPALITY_COUNT)
+    rng = np.random.default_rng(42)
+    codes = rng.choice(table.codes.to_numpy(), size=MUNICIPALITY_COUNT // 2, replace=False)
+    counts = pd.Series(rng.integers(1, 5_000, len(codes)), index=codes)
+    run.measure(
+        "build_choropleth_features",
+        lambda: build_choropleth_features(table, counts)["features"],
+        repeat,
+        municipalities=MUNICIPALITY_COUNT,
+    )
+
+
+def reset_database(db_path: Path, work_dir: Path) -> None:
+    """Aponta o app para `db_path` e o recria; só apaga bancos dentro de `work_dir`."""
+    db_path = db_path.resolve()
+    if not db_path.is_relative_to(work_dir.resolve()):
+        raise ValueError(f"Banco dos benchmarks fora de {work_dir}: {db_path}")
+    db.use_database(db_path)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    db.init_db()
+
+
+def run_benchmarks(args: argparse.Namespace, work_dir: Path, db_path: Path) -> BenchmarkRun:
+    """Roda os grupos de `args.only` sobre um banco novo em `db_path` (dentro de `work_dir`)."""
+    reset_database(db_path, work_dir)
+
+    groups = set(args.only)
+    run = BenchmarkRun()
+    largest_path: Path | None = None
+    for rows in sorted(args.rows):
+        path = ensure_dataset(work_dir, rows)
+        largest_path = path
+        if "load" in groups:
+            bench_load(run, path, rows, args.repeat)
+        if "filter" in groups:
+            bench_filter(run, path, rows, args.repeat)
+
+    if "assign" in groups and largest_path is not None:
+        ids = LocalFileRepository(largest_path).load(columns=["cnpj_cpf"])["cnpj_cpf"]
+        bench_assign(run, ids.astype(str).unique().tolist(), args.assign_sizes, args.repeat)
+    if "logs" in groups:
+        bench_logs(run, args.log_rows, args.repeat)
+    if "choropleth" in groups:
+        bench_choropleth(run, args.repeat)
+    return run
+
+
@@ -15,8 +15,8 @@ from src.services.geojson_service import download_municipality_geojson
 DATA_DIR = Path("data")
 
 
-def download_geojson(force: bool = False) -> Path:
-    geojson_path = download_municipality_geojson(DATA_DIR, force=force)
+def download_geojson(force: bool = False, workers: int = 1) -> Path:
+    geojson_path = download_municipality_geojson(DATA_DIR, force=force, workers=workers)
     print(f"GeoJSON salvo em {geojson_path}")
     return geojson_path
 
@@ -30,9 +30,15 @@ def main() -> None:
         action="store_true",
         help="Força o download mesmo que o arquivo já exista",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Número de processos usados na conversão do shapefile",
+    )
     args = parser.parse_args()
 
-    download_geojson(force=args.force)
+    download_geojson(force=args.force, workers=args.workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if not (PROJECT_ROOT / "src").exists():
+    PROJECT_ROOT = Path.cwd()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.models.db import init_db
+from src.repositories.prospects_repository import LocalFileRepository
+from src.services.executive_service import get_executive_map, list_executives
+from src.services.export_service import (
+    EXPORT_FORMATS,
+    EXPORT_KINDS,
+    export_file_name,
+    export_records,
+)
+from src.services.prospect_service import DEFAULT_RECORD_CHUNK_SIZE
+
+DATA_DIR = Path("data")
+PARTITIONED_DATA_PATH = DATA_DIR / "prospects"
+
+
+def export(
+    kind: str,
+    fmt: str,
+    output: Path | None,
+    executivo_id: int | None,
+    start: datetime | None,
+    end: datetime | None,
+    chunk_size: int,
+) -> Path:
+    init_db()
+    dataset_path = (
+        PARTITIONED_DATA_PATH if PARTITIONED_DATA_PATH.is_dir() else DATA_DIR / "prospects.parquet"
+    )
+    repo = LocalFileRepository(dataset_path) if dataset_path.exists() else None
+    output = output or Path(export_file_name(kind, fmt, executivo_id))
+    rows = export_records(
+        kind,
+        output,
+        fmt,
+        repo=repo,
+        executive_map=get_executive_map(list_executives()),
+        executivo_id=executivo_id,
+        start=start,
+        end=end,
+        chunk_size=chunk_size,
+    )
+    print(f"{rows} linhas exportadas para {output}")
+    return output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Exporta a carteira atual ou os logs de distribuição em CSV ou Parquet"
+    )
+    parser.add_argument("kind", choices=EXPORT_KINDS, help="Registros a exportar")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", dest="fmt")
+    parser.add_argument("--output", type=Path, default=None, help="Arquivo de saída")
+    parser.add_argument("--executivo", type=int, default=None, help="Id do executivo")
+    parser.add_argument(
+        "--inicio", type=datetime.fromisoformat, default=None, help="Data inicial (inclusiva)"
+    )
+    parser.add_argument(
+        "--fim", type=datetime.fromisoformat, default=None, help="Data final (exclusiva)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_RECORD_CHUNK_SIZE,
+        help="Linhas lidas e gravadas por bloco",
+    )
+    args = parser.parse_args()
+    export(args.kind, args.fmt, args.output, args.executivo, args.inicio, args.fim, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
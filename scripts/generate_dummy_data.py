@@ -1,18 +1,35 @@
+"""Gera o dataset dummy de prospects.
+
+Cada bloco de linhas é gerado coluna a coluna com NumPy: categorias, dígitos e
+datas saem de sorteios vetorizados, e textos do Faker (razão social, descrição
+do CNAE) vêm de pools pré-calculados. Cada bloco tem a própria semente,
+derivada de `--seed` e do índice do bloco, de modo que o resultado não depende
+do número de processos. Os blocos são gerados em paralelo e gravados em ordem,
+um row group por bloco, sem manter o dataset inteiro em memória.
+"""
+
 from __future__ import annotations
 
-from datetime import date, timedelta
+import argparse
+import os
+import shutil
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-import random
+from typing import Iterator
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from faker import Faker
 
 OUTPUT_PATH = Path("data") / "prospects.parquet"
-
-fake = Faker("pt_BR")
-random.seed(42)
-np.random.seed(42)
+PARTITIONED_OUTPUT_PATH = Path("data") / "prospects"
+PARTITION_COLUMNS = ["unidade_federal", "mes_ref"]
+DEFAULT_ROWS = 50_000
+DEFAULT_SEED = 42
+ROW_GROUP_ROWS = 250_000
+FAKER_POOL_SIZE = 5_000
 
 PUB_CREDITO = ["Verde", "Amarelo", "Cinza", "Vermelho", "Roxo"]
 RATINGS = ["A", "B", "C", "D"]
@@ -39,75 +56,252 @@ STATUS_CCL = ["REGULAR", "IRREGULAR"]
 STATUS_CNAE = ["ATIVO", "INATIVO"]
 OP_MEI = ["SIM", "NAO"]
 MARCA_ATUACAO = ["", "A", "B", "C"]
+POLIGONOS = [f"sp_{index}" for index in range(201)]
+
+START_DATE = np.datetime64("2023-01-01")
+END_DATE = np.datetime64("2024-12-31")
+MONTHS = [
+    f"{month}-01"
+    for month in np.arange(
+        START_DATE.astype("datetime64[M]"), END_DATE.astype("datetime64[M]") + 1
+    ).astype(str)
+]
+
+_pools: dict[str, pa.Array] | None = None
+
+
+def faker_pools(seed: int = DEFAULT_SEED, size: int = FAKER_POOL_SIZE) -> dict[str, pa.Array]:
+    """Textos do Faker sorteados uma vez; as linhas escolhem índices nesses pools."""
+    fake = Faker("pt_BR")
+    fake.seed_instance(seed)
+    return {
+        "nomecli": pa.array([fake.company() for _ in range(size)]),
+        "ds_cnae": pa.array([fake.job() for _ in range(size)]),
+    }
+
+
+def _init_worker(seed: int) -> None:
+    global _pools
+    _pools = faker_pools(seed)
+
+
+def _worker_pools(seed: int) -> dict[str, pa.Array]:
+    global _pools
+    if _pools is None:
+        _pools = faker_pools(seed)
+    return _pools
+
+
+def _digits(rng: np.random.Generator, digits: int, size: int) -> pa.Array:
+    """Números com exatamente `digits` dígitos, como texto."""
+    return _text(rng.integers(10 ** (digits - 1), 10**digits, size, dtype=np.int64))
+
+
+def _text(values: np.ndarray) -> pa.Array:
+    return pa.array(values).cast(pa.string())
+
+
+def _choice(rng: np.random.Generator, values: list[str] | pa.Array, size: int) -> pa.Array:
+    pool = values if isinstance(values, pa.Array) else pa.array(values)
+    return pool.take(rng.integers(0, len(pool), size))
+
+
+def _flags(rng: np.random.Generator, size: int) -> np.ndarray:
+    return rng.integers(0, 2, size, dtype=np.int64)
 
 
-def random_date(start: date, end: date) -> date:
-    delta_days = (end - start).days
-    return start + timedelta(days=random.randint(0, delta_days))
-
-
-def generate_rows(total: int) -> pd.DataFrame:
-    data = []
-    start_date = date(2023, 1, 1)
-    end_date = date(2024, 12, 31)
-
-    for _ in range(total):
-        cnpj_root = fake.random_number(digits=9, fix_len=True)
-        cnpj_full = fake.random_number(digits=14, fix_len=True)
-        cd_cnae = fake.random_number(digits=7, fix_len=True)
-        cd_cnae5 = str(cd_cnae)[:5]
-        uf = random.choice(UF)
-        polygon = f"sp_{random.randint(0, 200)}"
-        lat = float(np.random.uniform(-33.75, 5.3))
-        lon = float(np.random.uniform(-73.99, -34.8))
-        mes_ref = random_date(start_date, end_date)
-
-        data.append(
-            {
-                "pub_credito": random.choice(PUB_CREDITO),
-                "cnpj9": str(cnpj_root),
-                "rating": random.choice(RATINGS),
-                "porte": random.choice(PORTES),
-                "nomecli": fake.company(),
-                "cod_grp": str(fake.random_number(digits=6, fix_len=True)),
-                "fat_num": str(fake.random_number(digits=8, fix_len=True)),
-                "motivo_final": random.choice(MOTIVOS),
-                "status_ccl": random.choice(STATUS_CCL),
-                "pub_credito_grupo": random.choice(PUB_CREDITO),
-                "soma_fat_grp": str(fake.random_number(digits=9, fix_len=True)),
-                "cd_cnae5": cd_cnae5,
-                "cnpj_cpf": str(cnpj_full),
-                "faixa_fat": random.choice(FAIXAS_FAT),
-                "fl_cnae_foco": random.randint(0, 1),
-                "status_cnae": random.choice(STATUS_CNAE),
-                "fl_ramo_performar": random.randint(0, 1),
-                "cd_cnae": str(cd_cnae),
-                "ds_cnae": fake.job(),
-                "op_mei": random.choice(OP_MEI),
-                "fl_potencial": random.randint(0, 1),
-                "qtd_cnpj_grupo": random.randint(1, 20),
-                "unidade_federal": uf,
-                "funil": random.choice(FUNIS),
-                "segmento": random.choice(SEGMENTOS),
-                "campanha": random.choice(CAMPANHAS),
-                "fl_pep": random.randint(0, 1),
-                "status_cadastral": random.choice(STATUS_CADASTRAL),
-                "marca_atuacao": random.choice(MARCA_ATUACAO),
-                "mes_ref": mes_ref.isoformat(),
-                "poligono": polygon,
-                "lat": lat,
-                "long": lon,
-            }
+def generate_table(rows: int, chunk_index: int = 0, seed: int = DEFAULT_SEED) -> pa.Table:
+    """Bloco `chunk_index` do dataset; a mesma semente gera sempre as mesmas linhas."""
+    rng = np.random.default_rng([seed, chunk_index])
+    pools = _worker_pools(seed)
+
+    cd_cnae = rng.integers(1_000_000, 10_000_000, rows, dtype=np.int64)
+    # Um dia qualquer do período, truncado para o primeiro dia do mês.
+    days = rng.integers(0, int((END_DATE - START_DATE).astype(int)) + 1, rows)
+    month_offsets = (START_DATE + days).astype("datetime64[M]") - START_DATE.astype("datetime64[M]")
+
+    return pa.table(
+        {
+            "pub_credito": _choice(rng, PUB_CREDITO, rows),
+            "cnpj9": _digits(rng, 9, rows),
+            "rating": _choice(rng, RATINGS, rows),
+            "porte": _choice(rng, PORTES, rows),
+            "nomecli": _choice(rng, pools["nomecli"], rows),
+            "cod_grp": _digits(rng, 6, rows),
+            "fat_num": _digits(rng, 8, rows),
+            "motivo_final": _choice(rng, MOTIVOS, rows),
+            "status_ccl": _choice(rng, STATUS_CCL, rows),
+            "pub_credito_grupo": _choice(rng, PUB_CREDITO, rows),
+            "soma_fat_grp": _digits(rng, 9, rows),
+            "cd_cnae5": _text(cd_cnae // 100),
+            "cnpj_cpf": _digits(rng, 14, rows),
+            "faixa_fat": _choice(rng, FAIXAS_FAT, rows),
+            "fl_cnae_foco": _flags(rng, rows),
+            "status_cnae": _choice(rng, STATUS_CNAE, rows),
+            "fl_ramo_performar": _flags(rng, rows),
+            "cd_cnae": _text(cd_cnae),
+            "ds_cnae": _choice(rng, pools["ds_cnae"], rows),
+            "op_mei": _choice(rng, OP_MEI, rows),
+            "fl_potencial": _flags(rng, rows),
+            "qtd_cnpj_grupo": rng.integers(1, 21, rows, dtype=np.int64),
+            "unidade_federal": _choice(rng, UF, rows),
+            "funil": _choice(rng, FUNIS, rows),
+            "segmento": _choice(rng, SEGMENTOS, rows),
+            "campanha": _choice(rng, CAMPANHAS, rows),
+            "fl_pep": _flags(rng, rows),
+            "status_cadastral": _choice(rng, STATUS_CADASTRAL, rows),
+            "marca_atuacao": _choice(rng, MARCA_ATUACAO, rows),
+            "mes_ref": pa.array(MONTHS).take(month_offsets.astype(np.int64)),
+            "poligono": _choice(rng, POLIGONOS, rows),
+            "lat": rng.uniform(-33.75, 5.3, rows),
+            "long": rng.uniform(-73.99, -34.8, rows),
+        }
+    )
+
+
+def generate_rows(total: int, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """Dataset inteiro em memória, como DataFrame (útil para volumes pequenos)."""
+    tables = list(iter_chunks(total, seed=seed)) or [generate_table(0, 0, seed)]
+    return pa.concat_tables(tables).to_pandas()
+
+
+def _chunk_sizes(total: int, chunk_rows: int = ROW_GROUP_ROWS) -> list[int]:
+    return [min(chunk_rows, total - start) for start in range(0, total, chunk_rows)]
+
+
+def iter_chunks(
+    total: int,
+    workers: int = 1,
+    seed: int = DEFAULT_SEED,
+    chunk_rows: int = ROW_GROUP_ROWS,
+) -> Iterator[pa.Table]:
+    """Blocos em ordem; com `workers` > 1, gerados em paralelo (no máximo 2 por processo)."""
+    sizes = _chunk_sizes(total, chunk_rows)
+    if workers <= 1:
+        for index, rows in enumerate(sizes):
+            yield generate_table(rows, index, seed)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(seed,)
+    ) as executor:
+        pending: list[Future[pa.Table]] = []
+        for index, rows in enumerate(sizes):
+            pending.append(executor.submit(generate_table, rows, index, seed))
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def write_parquet(chunks: Iterator[pa.Table], output_path: Path) -> int:
+    """Grava um row group por bloco em um único arquivo; devolve o total de linhas."""
+    rows = 0
+    tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    writer: pq.ParquetWriter | None = None
+    try:
+        for table in chunks:
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table, row_group_size=max(table.num_rows, 1))
+            rows += table.num_rows
+        if writer is None:
+            # Nenhum bloco (ex.: `--rows 0`): arquivo vazio, mas com o schema completo.
+            pq.write_table(generate_table(0), tmp_path)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, output_path)
+    return rows
+
+
+def _partitions(table: pa.Table) -> Iterator[tuple[list[str], pa.Table]]:
+    """Fatias do bloco por valor das colunas de partição (sem essas colunas)."""
+    table = table.sort_by([(column, "ascending") for column in PARTITION_COLUMNS])
+    keys = [table[column].to_numpy(zero_copy_only=False) for column in PARTITION_COLUMNS]
+    changes = np.flatnonzero(np.any([key[1:] != key[:-1] for key in keys], axis=0)) + 1
+    bounds = [0, *changes.tolist(), table.num_rows]
+    values = table.drop_columns(PARTITION_COLUMNS)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end > start:
+            yield [str(key[start]) for key in keys], values.slice(start, end - start)
+
+
+def _clear_partitions(output_dir: Path) -> None:
+    """Remove as partições de uma geração anterior; recusa diretórios com outro conteúdo."""
+    if not output_dir.exists():
+        return
+    prefix = f"{PARTITION_COLUMNS[0]}="
+    entries = list(output_dir.iterdir())
+    unexpected = [entry for entry in entries if not entry.name.startswith(prefix)]
+    if unexpected:
+        raise ValueError(
+            f"{output_dir} contém arquivos fora do layout particionado "
+            f"({unexpected[0].name}); escolha outro --output."
         )
+    for entry in entries:
+        shutil.rmtree(entry)
 
-    return pd.DataFrame(data)
+
+def write_partitioned(chunks: Iterator[pa.Table], output_dir: Path) -> int:
+    """Grava no layout Hive `unidade_federal=XX/mes_ref=YYYY-MM-DD/part-0.parquet`.
+
+    Cada partição tem um único arquivo, aberto no primeiro bloco que a contém;
+    os blocos seguintes viram row groups desse arquivo.
+    """
+    _clear_partitions(output_dir)
+    rows = 0
+    writers: dict[tuple[str, ...], pq.ParquetWriter] = {}
+    try:
+        for table in chunks:
+            for values, part in _partitions(table):
+                writer = writers.get(tuple(values))
+                if writer is None:
+                    directory = output_dir.joinpath(
+                        *(f"{column}={value}" for column, value in zip(PARTITION_COLUMNS, values))
+                    )
+                    directory.mkdir(parents=True, exist_ok=True)
+                    writer = pq.ParquetWriter(directory / "part-0.parquet", part.schema)
+                    writers[tuple(values)] = writer
+                writer.write_table(part, row_group_size=part.num_rows)
+            rows += table.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return rows
 
 
 def main() -> None:
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    df = generate_rows(50000)
-    df.to_parquet(OUTPUT_PATH, index=False)
-    print(f"Wrote {len(df)} rows to {OUTPUT_PATH}")
+    parser = argparse.ArgumentParser(description="Gera o dataset dummy de prospects")
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        help="Grava em data/prospects/ particionado por unidade_federal e mes_ref",
+    )
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="Total de linhas")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processos geradores (0 = todos os núcleos)",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", type=Path, default=None, help="Arquivo ou diretório de saída")
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    chunks = iter_chunks(args.rows, workers=workers, seed=args.seed)
+    if args.partitioned:
+        output_path = args.output or PARTITIONED_OUTPUT_PATH
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        rows = write_partitioned(chunks, output_path)
+        print(f"Wrote {rows} rows to {output_path}/")
+        return
+
+    output_path = args.output or OUTPUT_PATH
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    rows = write_parquet(chunks, output_path)
+    print(f"Wrote {rows} rows to {output_path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if not (PROJECT_ROOT / "src").exists():
+    PROJECT_ROOT = Path.cwd()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.repositories.prospects_repository import LocalFileRepository
+from src.services.spatial_join_service import build_municipality_sidecar, sidecar_path
+
+DATA_DIR = Path("data")
+PARTITIONED_DATA_PATH = DATA_DIR / "prospects"
+
+
+def join_municipalities(level: str, workers: int | None = None) -> Path:
+    dataset_path = (
+        PARTITIONED_DATA_PATH if PARTITIONED_DATA_PATH.is_dir() else DATA_DIR / "prospects.parquet"
+    )
+    repo = LocalFileRepository(dataset_path)
+    sidecar = build_municipality_sidecar(
+        repo, DATA_DIR, level=None if level == "full" else level, workers=workers
+    )
+    matched = int(sidecar["municipio_ibge"].notna().sum())
+    path = sidecar_path(dataset_path)
+    print(f"{matched}/{len(sidecar)} prospects com município. Arquivo salvo em {path}")
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Calcula o código IBGE do município de cada prospect a partir de lat/long"
+    )
+    parser.add_argument(
+        "--level",
+        choices=["low", "medium", "high", "full"],
+        default="full",
+        help="Malha municipal usada na junção (o app lê o resultado da malha completa)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Número de processos (padrão: todos os núcleos)",
+    )
+    args = parser.parse_args()
+    join_municipalities(args.level, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.db import Base
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+ACTIVE_JOB_STATUSES = (JOB_PENDING, JOB_RUNNING)
+
+
+class AssignmentJob(Base):
+    __tablename__ = "assignment_jobs"
+    __table_args__ = (Index("ix_assignment_jobs_status_created", "status", "created_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    executivo_id: Mapped[int] = mapped_column(Integer, ForeignKey("executives.id"), nullable=False)
+    filter_set_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("filter_sets.id"), nullable=True
+    )
+    status: Mapped[str] = mapped_column(String, default=JOB_PENDING, nullable=False)
+    total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    processed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    assigned: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    overwritten: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    skipped_same_exec: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Processo que executa o job (`host:pid`); só ele ou sua ausência o encerram.
+    owner: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
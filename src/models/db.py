@@ -1,25 +1,104 @@
 from __future__ import annotations
 
+import threading
 from pathlib import Path
 from typing import Iterator
 
-from sqlalchemy import create_engine
+from sqlalchemy import Connection, Engine, create_engine, event, text
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 DB_PATH = Path("db") / "app.db"
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+SQLITE_CACHE_SIZE_KIB = 64 * 1024
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False, future=True)
+def _configure_sqlite(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_SECONDS * 1000}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def _create_engine(path: Path) -> Engine:
+    sqlite_engine = create_engine(
+        f"sqlite:///{path}",
+        echo=False,
+        future=True,
+        connect_args={"timeout": SQLITE_BUSY_TIMEOUT_SECONDS, "check_same_thread": False},
+    )
+    event.listen(sqlite_engine, "connect", _configure_sqlite)
+    return sqlite_engine
+
+
+engine = _create_engine(DB_PATH)
 SessionLocal = sessionmaker(bind=engine, class_=Session, autoflush=False, autocommit=False)
 
 
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def _register_models() -> None:
+    import src.models.assignment  # noqa: F401
+    import src.models.assignment_job  # noqa: F401
+    import src.models.executive  # noqa: F401
+    import src.models.filter_set  # noqa: F401
+
+
+def migrate(connection: Connection) -> list[int]:
+    """Aplica as migrações pendentes e devolve as versões aplicadas."""
+    from src.models.migrations import MIGRATIONS
+
+    current_version = connection.execute(text("PRAGMA user_version")).scalar_one()
+    applied: list[int] = []
+    for version, step in enumerate(MIGRATIONS, start=1):
+        if version > current_version:
+            step(connection)
+            connection.execute(text(f"PRAGMA user_version={version}"))
+            applied.append(version)
+    return applied
+
+
 def init_db() -> None:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    Base.metadata.create_all(engine)
+    """Cria o schema e aplica as migrações pendentes uma vez por processo."""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _register_models()
+        from src.models.migrations import VACUUM_AFTER
+
+        with engine.begin() as connection:
+            Base.metadata.create_all(connection)
+            applied = migrate(connection)
+        if VACUUM_AFTER.intersection(applied):
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                connection.exec_driver_sql("VACUUM")
+        _initialized = True
+
+
+def use_database(path: Path) -> None:
+    """Aponta o engine e as sessões para outro arquivo SQLite (ex.: benchmarks).
+
+    O schema e as migrações são aplicados de novo no próximo `init_db`.
+    """
+    global DB_PATH, engine, _initialized
+    with _init_lock:
+        engine.dispose()
+        DB_PATH = path
+        engine = _create_engine(path)
+        SessionLocal.configure(bind=engine)
+        _initialized = False
 
 
 def get_session() -> Iterator[Session]:
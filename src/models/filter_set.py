@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.db import Base
+
+
+class FilterSet(Base):
+    __tablename__ = "filter_sets"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    filters_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    filters_json: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+def _normalize_value(value: Any) -> Any:
+    if hasattr(value, "item") and not isinstance(value, (list, tuple, str)):
+        value = value.item()
+    if isinstance(value, (list, tuple, set)):
+        items = {_normalize_value(item) for item in value}
+        return sorted(items, key=lambda item: (type(item).__name__, item)) or None
+    if value == "":
+        return None
+    return value
+
+
+def canonical_filters_json(values: dict[str, Any]) -> str:
+    """JSON canônico dos filtros: listas ordenadas e só os filtros ativos.
+
+    Valores vazios, None e False (os padrões) são omitidos, para que filtros
+    novos com valor padrão não mudem o hash de conjuntos já gravados.
+    """
+    normalized = {key: _normalize_value(value) for key, value in values.items()}
+    normalized = {
+        key: value for key, value in normalized.items() if value is not None and value is not False
+    }
+    return json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def filters_hash(canonical_json: str) -> str:
+    return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
@@ -0,0 +1,154 @@
+"""Migrações incrementais do `app.db`.
+
+Cada passo roda uma única vez; a posição na lista (a partir de 1) é gravada em
+`PRAGMA user_version`. Bancos novos já nascem com o schema atual via
+`create_all`, então os passos precisam ser idempotentes.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+from sqlalchemy import Connection, text
+
+from src.models.db import Base
+from src.models.filter_set import FilterSet, canonical_filters_json, filters_hash
+
+FILTER_SET_TABLES = ("prospect_assignments", "distribution_logs")
+
+
+def _column_names(connection: Connection, table: str) -> set[str]:
+    return {row[1] for row in connection.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def _load_filters(raw_json: str) -> dict[str, Any]:
+    try:
+        values = json.loads(raw_json)
+    except ValueError:
+        return {}
+    return values if isinstance(values, dict) else {}
+
+
+def create_missing_indexes(connection: Connection) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def move_filters_to_filter_sets(connection: Connection) -> None:
+    """Troca o `filters_json` por linha por uma referência a `filter_sets`."""
+    for table in FILTER_SET_TABLES:
+        columns = _column_names(connection, table)
+        if "filter_set_id" not in columns:
+            connection.execute(
+                text(
+                    f"ALTER TABLE {table} ADD COLUMN filter_set_id INTEGER "
+                    "REFERENCES filter_sets (id)"
+                )
+            )
+        if "filters_json" not in columns:
+            continue
+
+        distinct_json = connection.execute(
+            text(f"SELECT DISTINCT filters_json FROM {table} WHERE filters_json IS NOT NULL")
+        ).scalars()
+        backfill = []
+        for raw_json in list(distinct_json):
+            canonical_json = canonical_filters_json(_load_filters(raw_json))
+            backfill.append(
+                {"raw_json": raw_json, "hash": filters_hash(canonical_json), "json": canonical_json}
+            )
+        if backfill:
+            connection.execute(
+                text(
+                    "INSERT INTO filter_sets (filters_hash, filters_json, created_at) "
+                    "VALUES (:hash, :json, CURRENT_TIMESTAMP) "
+                    "ON CONFLICT (filters_hash) DO NOTHING"
+                ),
+                backfill,
+            )
+            # Mapa JSON bruto -> hash em tabela temporária indexada: um único UPDATE
+            # em vez de uma varredura de `table` por JSON distinto.
+            connection.execute(
+                text(
+                    "CREATE TEMP TABLE filter_set_backfill "
+                    "(raw_json TEXT PRIMARY KEY, filters_hash TEXT NOT NULL)"
+                )
+            )
+            connection.execute(
+                text("INSERT INTO filter_set_backfill VALUES (:raw_json, :hash)"), backfill
+            )
+            connection.execute(
+                text(
+                    f"UPDATE {table} SET filter_set_id = ("
+                    f"SELECT filter_sets.id FROM filter_set_backfill "
+                    f"JOIN {FilterSet.__tablename__} AS filter_sets "
+                    "ON filter_sets.filters_hash = filter_set_backfill.filters_hash "
+                    f"WHERE filter_set_backfill.raw_json = {table}.filters_json) "
+                    "WHERE filters_json IS NOT NULL"
+                )
+            )
+            connection.execute(text("DROP TABLE filter_set_backfill"))
+        connection.execute(text(f"ALTER TABLE {table} DROP COLUMN filters_json"))
+
+
+def recanonicalize_filter_sets(connection: Connection) -> None:
+    """Recalcula o JSON canônico (sem filtros no valor padrão) e funde duplicatas."""
+    rows = connection.execute(
+        text(f"SELECT id, filters_json FROM {FilterSet.__tablename__} ORDER BY id")
+    ).all()
+    keep: dict[str, int] = {}
+    updates: list[dict[str, Any]] = []
+    merged: list[dict[str, int]] = []
+    for filter_set_id, raw_json in rows:
+        canonical_json = canonical_filters_json(_load_filters(raw_json))
+        digest = filters_hash(canonical_json)
+        if digest in keep:
+            merged.append({"old_id": filter_set_id, "new_id": keep[digest]})
+            continue
+        keep[digest] = filter_set_id
+        if canonical_json != raw_json:
+            updates.append({"id": filter_set_id, "hash": digest, "json": canonical_json})
+
+    if merged:
+        for table in FILTER_SET_TABLES:
+            connection.execute(
+                text(f"UPDATE {table} SET filter_set_id = :new_id WHERE filter_set_id = :old_id"),
+                merged,
+            )
+        connection.execute(
+            text(f"DELETE FROM {FilterSet.__tablename__} WHERE id = :old_id"), merged
+        )
+    if updates:
+        # Hash provisório primeiro: dois conjuntos podem trocar de hash entre si.
+        connection.execute(
+            text(
+                f"UPDATE {FilterSet.__tablename__} SET filters_hash = 'tmp:' || id "
+                "WHERE id = :id"
+            ),
+            updates,
+        )
+        connection.execute(
+            text(
+                f"UPDATE {FilterSet.__tablename__} SET filters_hash = :hash, filters_json = :json "
+                "WHERE id = :id"
+            ),
+            updates,
+        )
+
+
+def add_assignment_job_owner(connection: Connection) -> None:
+    if "owner" not in _column_names(connection, "assignment_jobs"):
+        connection.execute(text("ALTER TABLE assignment_jobs ADD COLUMN owner VARCHAR"))
+
+
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    create_missing_indexes,
+    move_filters_to_filter_sets,
+    recanonicalize_filter_sets,
+    add_assignment_job_owner,
+]
+
+# Migrações que liberam muito espaço; o VACUUM roda fora da transação.
+VACUUM_AFTER = {2}
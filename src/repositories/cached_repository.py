@@ -0,0 +1,180 @@
+"""Cache de prospects compartilhado por todas as sessões do processo.
+
+O Streamlit reexecuta o script a cada interação e cada sessão roda em uma
+thread própria. Este módulo mantém uma única cópia do dataset por fonte,
+recarregada apenas quando a assinatura da fonte (tamanho/mtime) muda.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Protocol, Sequence, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from src.repositories.month_keys import month_range_mask
+
+if TYPE_CHECKING:
+    from src.services.prospect_service import ProspectFilters
+
+T = TypeVar("T")
+
+# Colunas que permanecem como texto: identificadores únicos e colunas
+# comparadas por intervalo (categóricas não ordenadas não aceitam >=/<=).
+CATEGORICAL_EXCLUDE = ("cnpj_cpf", "cnpj9", "mes_ref")
+CATEGORICAL_MAX_RATIO = 0.5
+
+
+class VersionedProspectsRepository(Protocol):
+    def cache_key(self) -> str:
+        ...
+
+    def version(self) -> Hashable:
+        ...
+
+    def load(
+        self,
+        filters: ProspectFilters | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> pd.DataFrame:
+        ...
+
+
+@dataclass
+class ProspectSnapshot:
+    """Versão imutável do dataset carregada em memória.
+
+    Estruturas derivadas (índices, catálogos) podem ser anexadas via
+    `derive` e são descartadas junto com o snapshot quando a fonte muda.
+    """
+
+    frame: pd.DataFrame
+    version: Hashable
+    loaded_at: float
+    memory_bytes: int = field(init=False)
+    _derived: dict[str, Any] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        # Calculado uma vez: `deep=True` percorre as strings e custa segundos em 1M linhas.
+        self.memory_bytes = int(self.frame.memory_usage(index=True, deep=True).sum())
+
+    def derive(self, name: str, builder: Callable[[pd.DataFrame], T]) -> T:
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = builder(self.frame)
+            return self._derived[name]
+
+    def memory_usage(self) -> int:
+        return self.memory_bytes
+
+
+_SNAPSHOTS: dict[str, ProspectSnapshot] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def encode_categoricals(
+    df: pd.DataFrame,
+    exclude: Sequence[str] = CATEGORICAL_EXCLUDE,
+    max_ratio: float = CATEGORICAL_MAX_RATIO,
+) -> pd.DataFrame:
+    """Converte colunas de texto de baixa cardinalidade em `category`."""
+    rows = max(len(df), 1)
+    for column in df.columns:
+        if column in exclude or df[column].dtype != object:
+            continue
+        if df[column].nunique(dropna=True) / rows <= max_ratio:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def apply_filters_in_memory(df: pd.DataFrame, filters: ProspectFilters | None) -> pd.DataFrame:
+    if filters is None:
+        return df
+
+    mask = np.ones(len(df), dtype=bool)
+    for filter_field in fields(filters):
+        values = getattr(filters, filter_field.name)
+        if filter_field.name in df.columns and isinstance(values, list) and values:
+            mask &= df[filter_field.name].isin(values).to_numpy()
+    if "mes_ref" in df.columns and (filters.mes_ref_start or filters.mes_ref_end):
+        mask &= month_range_mask(df["mes_ref"], *filters.mes_ref_range)
+
+    if mask.all():
+        return df
+    return df.take(np.flatnonzero(mask))
+
+
+class CachedProspectsRepository:
+    """Envolve um repositório versionado com um snapshot por processo.
+
+    `enrich` recebe o dataset recém-carregado e pode acrescentar colunas
+    derivadas (ex.: `municipio_ibge`); roda uma vez por versão da fonte.
+
+    O snapshot é o dataset inteiro (todas as UFs e meses), lido sem filtros:
+    uma cópia atende todas as sessões e UFs, e os filtros viram posições no
+    índice em memória. O pushdown de UF/`mes_ref` e o descarte de partições
+    da fonte valem só para quem lê a fonte direto (scripts, exportação,
+    benchmarks); datasets maiores que a memória pedem a fonte sem o cache.
+    """
+
+    def __init__(
+        self,
+        source: VersionedProspectsRepository,
+        enrich: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+    ) -> None:
+        self.source = source
+        self.enrich = enrich
+
+    def snapshot(self) -> ProspectSnapshot:
+        key = self.source.cache_key()
+        version = self.source.version()
+
+        current = _SNAPSHOTS.get(key)
+        if current is not None and current.version == version:
+            return current
+
+        with _SNAPSHOTS_LOCK:
+            current = _SNAPSHOTS.get(key)
+            if current is not None and current.version == version:
+                return current
+            frame = self.source.load()
+            if self.enrich is not None:
+                frame = self.enrich(frame)
+            frame = encode_categoricals(frame)
+            current = ProspectSnapshot(frame=frame, version=version, loaded_at=time.time())
+            _SNAPSHOTS[key] = current
+            return current
+
+    def load(
+        self,
+        filters: ProspectFilters | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> pd.DataFrame:
+        df = apply_filters_in_memory(self.snapshot().frame, filters)
+        if columns is not None:
+            return df[list(columns)]
+        return df.copy(deep=False)
+
+    def column_names(self) -> list[str]:
+        return list(self.snapshot().frame.columns)
+
+    def version(self) -> Hashable:
+        return self.snapshot().version
+
+    def memory_usage(self) -> int:
+        """Bytes ocupados pelo snapshot em memória desta fonte."""
+        return self.snapshot().memory_usage()
+
+
+def cache_memory_usage() -> int:
+    """Total de bytes ocupados por todos os snapshots do processo."""
+    return sum(snapshot.memory_usage() for snapshot in list(_SNAPSHOTS.values()))
+
+
+def clear_cache() -> None:
+    with _SNAPSHOTS_LOCK:
+        _SNAPSHOTS.clear()
@@ -0,0 +1,121 @@
+"""Chaves inteiras de mês para `mes_ref`.
+
+`mes_ref` chega como texto ISO (`2024-05-01`). Comparar strings depende do
+formato de cada valor; aqui cada mês vira `ano * 12 + (mês - 1)`, um inteiro
+compacto que ordena corretamente e permite intervalos por `searchsorted`.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+if TYPE_CHECKING:
+    from src.services.prospect_service import ProspectFilters
+
+INVALID_MONTH_KEY = -1
+MONTH_PATTERN = re.compile(r"^(\d{4})-(\d{2})(?:-(\d{2}))?$")
+
+
+def parse_month(value: str) -> int:
+    """Chave do mês de `value` (YYYY-MM ou YYYY-MM-DD); ValueError se inválido."""
+    match = MONTH_PATTERN.match(value.strip())
+    if match:
+        year, month, day = match.groups()
+        try:
+            pd.Timestamp(int(year), int(month), int(day or 1))
+        except ValueError:
+            match = None
+    if not match:
+        raise ValueError(f"Mês de referência inválido: {value!r}. Use YYYY-MM ou YYYY-MM-DD.")
+    return int(year) * 12 + int(month) - 1
+
+
+def month_label(key: int) -> str:
+    """Texto `YYYY-MM` do mês, usado como limite de comparação em texto."""
+    return f"{key // 12:04d}-{key % 12 + 1:02d}"
+
+
+def month_start(key: int) -> str:
+    return f"{month_label(key)}-01"
+
+
+def _value_key(value: Any) -> int:
+    if hasattr(value, "year") and hasattr(value, "month"):
+        return value.year * 12 + value.month - 1
+    try:
+        return parse_month(str(value)[:10])
+    except ValueError:
+        return INVALID_MONTH_KEY
+
+
+def month_keys(values: pd.Series) -> np.ndarray:
+    """Chave int32 de cada valor; nulos e textos inválidos viram `INVALID_MONTH_KEY`."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        valid = values.notna().to_numpy()
+        keys = values.dt.year.to_numpy(dtype=float) * 12 + values.dt.month.to_numpy(dtype=float) - 1
+        return np.where(valid, np.nan_to_num(keys), INVALID_MONTH_KEY).astype(np.int32)
+
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    unique_keys = np.array(
+        [_value_key(value) for value in uniques] + [INVALID_MONTH_KEY], dtype=np.int32
+    )
+    # O código -1 (nulo) cai no slot extra do fim.
+    return unique_keys[codes]
+
+
+def month_range_mask(
+    values: pd.Series, start: int | None, end: int | None
+) -> np.ndarray:
+    keys = month_keys(values)
+    mask = keys != INVALID_MONTH_KEY
+    if start is not None:
+        mask &= keys >= start
+    if end is not None:
+        mask &= keys <= end
+    return mask
+
+
+def month_text_bounds(filters: ProspectFilters) -> tuple[str | None, str | None]:
+    """Limites em texto `[início, fim)` que cobrem os meses inteiros do filtro.
+
+    Servem para o pushdown em colunas texto ISO: `>= "2024-05"` e
+    `< "2024-07"` incluem qualquer dia de maio e junho. O resultado é um
+    superconjunto, refinado depois pelas chaves de mês.
+    """
+    start, end = filters.mes_ref_range
+    return (
+        None if start is None else month_label(start),
+        None if end is None else month_label(end + 1),
+    )
+
+
+def _month_date(key: int) -> date:
+    return date(key // 12, key % 12 + 1, 1)
+
+
+def month_bounds(
+    filters: ProspectFilters, data_type: pa.DataType | None = None
+) -> tuple[Any, Any]:
+    """Limites `[início, fim)` do filtro no tipo da coluna `mes_ref`.
+
+    Texto (ou tipo desconhecido) usa `month_text_bounds`; colunas date usam
+    `date` e timestamp usam `datetime` no primeiro dia do mês. Para outros
+    tipos não há pushdown (None, None) e vale só o filtro por chaves de mês.
+    """
+    if data_type is not None and pa.types.is_dictionary(data_type):
+        data_type = data_type.value_type
+    if data_type is None or pa.types.is_string(data_type) or pa.types.is_large_string(data_type):
+        return month_text_bounds(filters)
+    if not (pa.types.is_date(data_type) or pa.types.is_timestamp(data_type)):
+        return None, None
+    start, end = filters.mes_ref_range
+    keys = (start, None if end is None else end + 1)
+    if pa.types.is_timestamp(data_type):
+        return tuple(None if key is None else datetime(key // 12, key % 12 + 1, 1) for key in keys)
+    return tuple(None if key is None else _month_date(key) for key in keys)
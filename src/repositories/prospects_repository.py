@@ -1,38 +1,179 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Protocol
+from typing import TYPE_CHECKING, Any, Protocol, Sequence
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from src.repositories.month_keys import month_bounds
+from src.repositories.sql_repository import DbApiRepository
+
+if TYPE_CHECKING:
+    from src.services.prospect_service import ProspectFilters
 
 
 class ProspectsRepository(Protocol):
-    def load(self) -> pd.DataFrame:
+    def load(
+        self,
+        filters: ProspectFilters | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> pd.DataFrame:
         ...
 
 
+def build_filter_expression(
+    filters: ProspectFilters | None, schema: pa.Schema
+) -> ds.Expression | None:
+    """Traduz `ProspectFilters` em uma expressão de filtro do pyarrow.
+
+    Apenas campos com lista de valores que correspondem a colunas do dataset
+    entram na expressão; `mes_ref_start`/`mes_ref_end` viram um intervalo de
+    meses inteiros no tipo da coluna (texto, date ou timestamp), reaplicado
+    depois com as chaves de mês.
+    """
+    if filters is None:
+        return None
+
+    expression: ds.Expression | None = None
+
+    def combine(condition: ds.Expression) -> None:
+        nonlocal expression
+        expression = condition if expression is None else expression & condition
+
+    available_columns = schema.names
+    for filter_field in fields(filters):
+        values = getattr(filters, filter_field.name)
+        if filter_field.name not in available_columns or not isinstance(values, list) or not values:
+            continue
+        combine(ds.field(filter_field.name).isin(values))
+
+    if "mes_ref" in available_columns:
+        data_type = schema.field("mes_ref").type
+        start, end = month_bounds(filters, data_type)
+        if start is not None:
+            combine(ds.field("mes_ref") >= pa.scalar(start, type=data_type))
+        if end is not None:
+            combine(ds.field("mes_ref") < pa.scalar(end, type=data_type))
+
+    return expression
+
+
 @dataclass
 class LocalFileRepository:
+    """Lê prospects de um arquivo .parquet/.csv ou de um diretório particionado.
+
+    Diretórios seguem o layout Hive (`unidade_federal=SP/mes_ref=2024-05-01/`);
+    filtros sobre as chaves de partição descartam diretórios inteiros.
+    """
+
     file_path: Path
 
-    def load(self) -> pd.DataFrame:
+    def load(
+        self,
+        filters: ProspectFilters | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> pd.DataFrame:
         if not self.file_path.exists():
             raise FileNotFoundError(f"Prospects file not found: {self.file_path}")
 
-        if self.file_path.suffix == ".parquet":
-            return pd.read_parquet(self.file_path)
+        if self.file_path.is_dir() or self.file_path.suffix == ".parquet":
+            return self._load_parquet(filters, columns)
         if self.file_path.suffix == ".csv":
-            return pd.read_csv(self.file_path)
+            return pd.read_csv(self.file_path, usecols=list(columns) if columns else None)
         raise ValueError("Unsupported file format. Use .csv or .parquet")
 
+    def cache_key(self) -> str:
+        return f"file:{self.file_path.resolve()}"
+
+    def version(self) -> tuple[int, int, int]:
+        """Assinatura (arquivos, bytes, mtime_ns mais recente) usada para invalidar caches."""
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"Prospects file not found: {self.file_path}")
+        if not self.file_path.is_dir():
+            stat = self.file_path.stat()
+            return 1, stat.st_size, stat.st_mtime_ns
+
+        files = 0
+        total_size = 0
+        latest_mtime = self.file_path.stat().st_mtime_ns
+        for path in self.file_path.rglob("*.parquet"):
+            stat = path.stat()
+            files += 1
+            total_size += stat.st_size
+            latest_mtime = max(latest_mtime, stat.st_mtime_ns)
+        return files, total_size, latest_mtime
+
+    def column_names(self) -> list[str]:
+        if self.file_path.is_dir() or self.file_path.suffix == ".parquet":
+            return self._dataset().schema.names
+        return list(pd.read_csv(self.file_path, nrows=0).columns)
+
+    def _dataset(self) -> ds.Dataset:
+        if self.file_path.is_dir():
+            return ds.dataset(
+                self.file_path,
+                format="parquet",
+                partitioning=ds.HivePartitioning.discover(infer_dictionary=False),
+                exclude_invalid_files=True,
+            )
+        return ds.dataset(self.file_path, format="parquet")
+
+    def _load_parquet(
+        self, filters: ProspectFilters | None, columns: Sequence[str] | None
+    ) -> pd.DataFrame:
+        dataset = self._dataset()
+        expression = build_filter_expression(filters, dataset.schema)
+        table = dataset.to_table(
+            columns=list(columns) if columns is not None else None,
+            filter=expression,
+        )
+        return table.to_pandas()
+
 
 @dataclass
 class ImpalaOdbcRepository:
+    """Lê a tabela de prospects do Impala via ODBC (requer `pyodbc` instalado)."""
+
     dsn: str
     database: str
+    table: str = "prospects"
+    snapshot_dir: Path | None = Path("data") / "snapshots"
+    _inner: DbApiRepository | None = field(default=None, init=False, repr=False)
 
-    def load(self) -> pd.DataFrame:
-        raise NotImplementedError(
-            "Impala ODBC repository is a stub. Provide ODBC connection in production."
-        )
+    def _connect(self) -> Any:
+        try:
+            import pyodbc
+        except ImportError as exc:  # pragma: no cover - depende do ambiente
+            raise RuntimeError(
+                "pyodbc não está instalado. Instale o driver ODBC e o pacote pyodbc."
+            ) from exc
+        return pyodbc.connect(f"DSN={self.dsn};Database={self.database}", autocommit=True)
+
+    def _repository(self) -> DbApiRepository:
+        # Mantido entre chamadas: guarda as colunas já lidas do warehouse.
+        if self._inner is None:
+            self._inner = DbApiRepository(
+                connection_factory=self._connect,
+                table=self.table,
+                snapshot_dir=self.snapshot_dir,
+            )
+        return self._inner
+
+    def cache_key(self) -> str:
+        return f"impala:{self.dsn}:{self.database}.{self.table}"
+
+    def version(self) -> int:
+        return self._repository().version()
+
+    def column_names(self) -> list[str]:
+        return self._repository().column_names()
+
+    def load(
+        self,
+        filters: ProspectFilters | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> pd.DataFrame:
+        return self._repository().load(filters=filters, columns=columns)
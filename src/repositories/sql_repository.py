@@ -0,0 +1,283 @@
+"""Repositório de prospects sobre qualquer conexão DB-API 2.0.
+
+Os filtros viram cláusulas WHERE parametrizadas, o resultado é lido em blocos
+com `fetchmany` e convertido em record batches do Arrow. Cada consulta é
+gravada em um snapshot parquet local, chaveado pelo SQL e parâmetros, para que
+o warehouse não precise reenviar a tabela a cada rerun do Streamlit.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.repositories.month_keys import month_bounds
+
+if TYPE_CHECKING:
+    from src.services.prospect_service import ProspectFilters
+
+IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+# Caracteres do sha256 da consulta usados no nome do snapshot.
+SNAPSHOT_KEY_LENGTH = 24
+
+# `type_code` de `cursor.description` quando o driver informa um tipo Python (ex.: pyodbc).
+DESCRIPTION_TYPES = {
+    bool: pa.bool_(),
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    bytes: pa.binary(),
+    bytearray: pa.binary(),
+    datetime.datetime: pa.timestamp("us"),
+    datetime.date: pa.date32(),
+}
+
+
+def _check_identifier(name: str) -> str:
+    if not IDENTIFIER_PATTERN.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
+def build_where_clause(
+    filters: ProspectFilters | None,
+    available_columns: Sequence[str],
+    placeholder: str = "?",
+    mes_ref_type: pa.DataType | None = None,
+) -> tuple[str, list[Any]]:
+    """Traduz `ProspectFilters` em um WHERE parametrizado (mesmas regras do parquet).
+
+    Os limites de `mes_ref` seguem `mes_ref_type` (tipo informado pelo cursor):
+    `date`/`datetime` para colunas de data, texto quando o tipo é desconhecido.
+    """
+    if filters is None:
+        return "", []
+
+    conditions: list[str] = []
+    params: list[Any] = []
+    for filter_field in fields(filters):
+        values = getattr(filters, filter_field.name)
+        if filter_field.name not in available_columns or not isinstance(values, list) or not values:
+            continue
+        conditions.append(
+            f"{_check_identifier(filter_field.name)} IN ({', '.join([placeholder] * len(values))})"
+        )
+        params.extend(values)
+
+    if "mes_ref" in available_columns:
+        start, end = month_bounds(filters, mes_ref_type)
+        if start is not None:
+            conditions.append(f"mes_ref >= {placeholder}")
+            params.append(start)
+        if end is not None:
+            conditions.append(f"mes_ref < {placeholder}")
+            params.append(end)
+
+    if not conditions:
+        return "", []
+    return " WHERE " + " AND ".join(conditions), params
+
+
+@dataclass
+class DbApiRepository:
+    """Lê prospects de `table` usando conexões criadas por `connection_factory`.
+
+    `snapshot_dir` habilita os snapshots parquet; eles expiram após
+    `snapshot_ttl_seconds`, quando a consulta volta a ser enviada ao banco.
+    """
+
+    connection_factory: Callable[[], Any]
+    table: str
+    snapshot_dir: Path | None = None
+    snapshot_ttl_seconds: int = 3600
+    batch_size: int = 50_000
+    placeholder: str = "?"
+    _columns: list[str] | None = field(default=None, init=False, repr=False)
+    _column_types: dict[str, pa.DataType | None] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    def cache_key(self) -> str:
+        return f"dbapi:{self.table}:{self.snapshot_dir}"
+
+    def version(self) -> int:
+        """Janela de validade atual; muda a cada `snapshot_ttl_seconds`."""
+        return int(time.time() // self.snapshot_ttl_seconds)
+
+    def column_names(self) -> list[str]:
+        if self._columns is None:
+            connection = self.connection_factory()
+            try:
+                cursor = connection.cursor()
+                cursor.execute(f"SELECT * FROM {_check_identifier(self.table)} WHERE 1 = 0")
+                self._columns = [description[0] for description in cursor.description]
+                self._column_types = {
+                    description[0]: _description_type(description[1])
+                    for description in cursor.description
+                }
+                cursor.close()
+            finally:
+                connection.close()
+        return self._columns
+
+    def build_query(
+        self,
+        filters: ProspectFilters | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> tuple[str, list[Any]]:
+        select_list = (
+            ", ".join(_check_identifier(column) for column in columns) if columns else "*"
+        )
+        where, params = build_where_clause(
+            filters, self.column_names(), self.placeholder, self._column_types.get("mes_ref")
+        )
+        return f"SELECT {select_list} FROM {_check_identifier(self.table)}{where}", params
+
+    def iter_batches(
+        self,
+        filters: ProspectFilters | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> Iterator[pa.RecordBatch]:
+        query, params = self.build_query(filters, columns)
+        connection = self.connection_factory()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(query, params)
+            names = [description[0] for description in cursor.description]
+            types = [_description_type(description[1]) for description in cursor.description]
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                yield _rows_to_batch(rows, names, types)
+            cursor.close()
+        finally:
+            connection.close()
+
+    def load(
+        self,
+        filters: ProspectFilters | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> pd.DataFrame:
+        if self.snapshot_dir is None:
+            tables = [
+                pa.Table.from_batches([batch]) for batch in self.iter_batches(filters, columns)
+            ]
+            if not tables:
+                return pd.DataFrame(columns=list(columns or self.column_names()))
+            return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+        snapshot_path = self._snapshot_path(*self.build_query(filters, columns))
+        if not self._is_fresh(snapshot_path):
+            self._write_snapshot(snapshot_path, filters, columns)
+            self._remove_expired_snapshots()
+        return pq.read_table(snapshot_path).to_pandas()
+
+    def _snapshot_path(self, query: str, params: list[Any]) -> Path:
+        key = hashlib.sha256(
+            json.dumps([query, params], default=str, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        return self.snapshot_dir / f"{self.table}-{key[:SNAPSHOT_KEY_LENGTH]}.parquet"
+
+    def _is_fresh(self, snapshot_path: Path) -> bool:
+        try:
+            modified = snapshot_path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return time.time() - modified < self.snapshot_ttl_seconds
+
+    def _remove_expired_snapshots(self) -> None:
+        """Apaga os snapshots vencidos da tabela; a próxima leitura iria ao banco de todo modo."""
+        pattern = f"{self.table}-{'?' * SNAPSHOT_KEY_LENGTH}.parquet"
+        for path in self.snapshot_dir.glob(pattern):
+            if not self._is_fresh(path):
+                path.unlink(missing_ok=True)
+
+    def _write_snapshot(
+        self,
+        snapshot_path: Path,
+        filters: ProspectFilters | None,
+        columns: Sequence[str] | None,
+    ) -> None:
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = snapshot_path.with_suffix(f".{os.getpid()}.tmp")
+        writer: pq.ParquetWriter | None = None
+        try:
+            for batch in self.iter_batches(filters, columns):
+                table = pa.Table.from_batches([batch])
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                elif not table.schema.equals(writer.schema):
+                    schema = pa.unify_schemas(
+                        [writer.schema, table.schema], promote_options="permissive"
+                    )
+                    if not schema.equals(writer.schema):
+                        writer.close()
+                        writer = None
+                        writer = _rewrite_with_schema(tmp_path, schema)
+                writer.write_table(table.cast(writer.schema))
+            if writer is None:
+                names = list(columns or self.column_names())
+                empty = pa.table({name: pa.array([], type=pa.string()) for name in names})
+                pq.write_table(empty, tmp_path)
+            else:
+                writer.close()
+                writer = None
+            os.replace(tmp_path, snapshot_path)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+
+def _rewrite_with_schema(path: Path, schema: pa.Schema) -> pq.ParquetWriter:
+    """Copia os blocos já gravados em `path` para um novo arquivo com `schema` promovido.
+
+    Acontece quando um bloco traz um tipo novo para a coluna (ex.: só NULLs no
+    primeiro bloco e floats depois); o arquivo reaberto segue recebendo blocos.
+    """
+    previous = path.with_suffix(".previous")
+    os.replace(path, previous)
+    writer = pq.ParquetWriter(path, schema)
+    try:
+        for batch in pq.ParquetFile(previous).iter_batches():
+            writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+    except BaseException:
+        writer.close()
+        raise
+    finally:
+        previous.unlink(missing_ok=True)
+    return writer
+
+
+def _description_type(type_code: Any) -> pa.DataType | None:
+    try:
+        return DESCRIPTION_TYPES.get(type_code)
+    except TypeError:
+        return None
+
+
+def _rows_to_batch(
+    rows: Sequence[Sequence[Any]], names: list[str], types: Sequence[pa.DataType | None]
+) -> pa.RecordBatch:
+    """Bloco do Arrow; colunas sem tipo na descrição do cursor têm o tipo inferido.
+
+    Uma coluna só com NULLs no bloco fica com o tipo `null`, promovido ao tipo
+    real quando um bloco seguinte trouxer valores.
+    """
+    arrays = [
+        pa.array(values, type=data_type) for values, data_type in zip(zip(*rows), types)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, names=names)
@@ -0,0 +1,157 @@
+"""Índice em memória da carteira atual (`cnpj_cpf` -> `executivo_id`).
+
+Lido de `prospect_assignments` uma vez por processo e atualizado a cada commit
+de `assign_prospects`/`assign_allocation`, permite marcar ou excluir prospects
+já atribuídos sem consultar o banco linha a linha. Para o snapshot em cache, o
+dono de cada linha sai de um array alinhado aos `cnpj_cpf` distintos, ajustado
+apenas com as alterações feitas desde a última consulta. Gravações feitas por
+outros processos só aparecem depois de `reload`.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from src.models.assignment import ProspectAssignment
+from src.models.db import get_session
+
+if TYPE_CHECKING:
+    from src.services.prospect_service import ProspectFilters
+
+UNASSIGNED = -1
+# Alterações guardadas para atualizar os arrays alinhados; além disso, refaz tudo.
+ASSIGNMENT_INDEX_MAX_CHANGES = 256
+
+
+class AssignmentIndex:
+    def __init__(self) -> None:
+        self._owners: dict[str, int] | None = None
+        self._changes: deque[tuple[int, np.ndarray, np.ndarray]] = deque(
+            maxlen=ASSIGNMENT_INDEX_MAX_CHANGES
+        )
+        self.version = 0
+        self._lock = threading.RLock()
+
+    def _ensure_loaded(self) -> dict[str, int]:
+        with self._lock:
+            if self._owners is None:
+                with next(get_session()) as session:
+                    rows = session.execute(
+                        select(ProspectAssignment.cnpj_cpf, ProspectAssignment.executivo_id)
+                    )
+                    self._owners = {cnpj_cpf: executivo_id for cnpj_cpf, executivo_id in rows}
+                self._changes.clear()
+                self.version += 1
+            return self._owners
+
+    def reload(self) -> None:
+        with self._lock:
+            self._owners = None
+            self._ensure_loaded()
+
+    def record(self, prospect_ids: Sequence[str], executive_ids: Sequence[int]) -> None:
+        """Aplica atribuições já gravadas; sem efeito enquanto o índice não foi lido."""
+        with self._lock:
+            if self._owners is None or not len(prospect_ids):
+                return
+            self._owners.update(zip(prospect_ids, executive_ids))
+            self.version += 1
+            self._changes.append(
+                (
+                    self.version,
+                    np.asarray(prospect_ids, dtype=object),
+                    np.asarray(executive_ids, dtype=np.int64),
+                )
+            )
+
+    def lookup(self, keys: pd.Index) -> np.ndarray:
+        """Executivo atual de cada chave distinta em `keys` (`UNASSIGNED` se nenhum)."""
+        return self.align(keys)[0]
+
+    def align(
+        self, keys: pd.Index, owner_by_key: np.ndarray | None = None, version: int = -1
+    ) -> tuple[np.ndarray, int]:
+        """Atualiza `owner_by_key` (alinhado a `keys`, lido na `version`) até a versão atual.
+
+        Aplica só as alterações posteriores quando ainda estão no histórico;
+        caso contrário, refaz o array a partir do dicionário completo.
+        """
+        with self._lock:
+            owners = self._ensure_loaded()
+            if owner_by_key is not None and version == self.version:
+                return owner_by_key, version
+            changes = [
+                (ids, execs) for change_version, ids, execs in self._changes
+                if change_version > version
+            ]
+            complete = bool(self._changes) and self._changes[0][0] <= version + 1
+            if owner_by_key is not None and complete:
+                owner_by_key = owner_by_key.copy()
+                for ids, execs in changes:
+                    _apply(owner_by_key, keys, ids, execs)
+            else:
+                owner_by_key = np.full(len(keys), UNASSIGNED, dtype=np.int64)
+                if owners:
+                    ids = np.array(list(owners), dtype=object)
+                    _apply(owner_by_key, keys, ids, owners.values())
+            return owner_by_key, self.version
+
+
+def _apply(
+    owner_by_key: np.ndarray, keys: pd.Index, ids: np.ndarray, execs: Iterable[int]
+) -> None:
+    positions = keys.get_indexer(pd.Index(ids))
+    found = positions >= 0
+    owner_by_key[positions[found]] = np.fromiter(execs, dtype=np.int64, count=len(ids))[found]
+
+
+@dataclass
+class RowOwners:
+    """Dono atual de cada linha de um frame, via códigos de `cnpj_cpf`."""
+
+    codes: np.ndarray
+    keys: pd.Index
+    _owner_by_key: np.ndarray | None = field(default=None, repr=False)
+    _version: int = field(default=-1, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def build(cls, prospect_ids: pd.Series) -> RowOwners:
+        codes, uniques = pd.factorize(prospect_ids.astype(str), use_na_sentinel=True)
+        return cls(codes=codes, keys=pd.Index(uniques))
+
+    def owners(self, index: AssignmentIndex, positions: np.ndarray | None = None) -> np.ndarray:
+        """Dono de cada linha (ou só das `positions` informadas)."""
+        with self._lock:
+            self._owner_by_key, self._version = index.align(
+                self.keys, self._owner_by_key, self._version
+            )
+            owner_by_key = self._owner_by_key
+        codes = self.codes if positions is None else self.codes[positions]
+        # O slot extra no fim absorve o código -1 (cnpj_cpf nulo).
+        return np.append(owner_by_key, UNASSIGNED)[codes]
+
+
+def assignment_mask(owners: np.ndarray, filters: ProspectFilters) -> np.ndarray | None:
+    """Linhas aceitas pelos filtros de carteira (anti-join), ou None se nenhum está ativo."""
+    mask = None
+    if filters.only_unassigned:
+        mask = owners == UNASSIGNED
+    if filters.exclude_executivo_ids:
+        kept = ~np.isin(owners, np.asarray(filters.exclude_executivo_ids, dtype=np.int64))
+        mask = kept if mask is None else mask & kept
+    return mask
+
+
+_ASSIGNMENT_INDEX = AssignmentIndex()
+
+
+def assignment_index() -> AssignmentIndex:
+    return _ASSIGNMENT_INDEX
@@ -0,0 +1,174 @@
+"""Cargas de prospects em segundo plano.
+
+Cada clique em "Carregar para executivo" vira uma linha em `assignment_jobs`
+executada por um pool de threads do processo. `assign_prospects` faz commit a
+cada bloco e o job registra o progresso e as contagens parciais, de modo que a
+página apenas consulta o status, inclusive depois de um refresh do navegador.
+Cada job guarda o processo dono (`host:pid`); jobs ativos cujo dono já não
+existe (o processo terminou no meio da carga) são marcados como falhos, sem
+afetar jobs que ainda rodam em outro processo do Streamlit.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import select, update
+
+from src.models.assignment_job import (
+    ACTIVE_JOB_STATUSES,
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_PENDING,
+    JOB_RUNNING,
+    AssignmentJob,
+)
+from src.models.db import get_session
+from src.services.prospect_service import (
+    AssignmentResult,
+    ProspectFilters,
+    assign_prospects,
+    get_or_create_filter_set,
+)
+
+# O SQLite aceita um escritor por vez; mais threads só disputariam o lock.
+ASSIGNMENT_JOB_WORKERS = 1
+INTERRUPTED_JOB_MESSAGE = "Carga interrompida: o servidor foi reiniciado durante a execução."
+
+_executor = ThreadPoolExecutor(
+    max_workers=ASSIGNMENT_JOB_WORKERS, thread_name_prefix="assignment-job"
+)
+PROCESS_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _update_job(job_id: int, **values: Any) -> None:
+    with next(get_session()) as session:
+        session.execute(update(AssignmentJob).where(AssignmentJob.id == job_id).values(**values))
+        session.commit()
+
+
+def _owner_alive(owner: str | None) -> bool:
+    """Se o processo dono ainda existe; de outro host, presume-se que sim."""
+    if owner is None:
+        return False
+    if owner == PROCESS_OWNER:
+        return True
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+def recover_interrupted_jobs() -> int:
+    """Marca como falhos os jobs ativos cujo processo dono já terminou."""
+    with next(get_session()) as session:
+        active = session.execute(
+            select(AssignmentJob.id, AssignmentJob.owner).where(
+                AssignmentJob.status.in_(ACTIVE_JOB_STATUSES)
+            )
+        ).all()
+        orphaned = [job_id for job_id, owner in active if not _owner_alive(owner)]
+        if not orphaned:
+            return 0
+        result = session.execute(
+            update(AssignmentJob)
+            .where(
+                AssignmentJob.id.in_(orphaned),
+                AssignmentJob.status.in_(ACTIVE_JOB_STATUSES),
+            )
+            .values(
+                status=JOB_FAILED,
+                error=INTERRUPTED_JOB_MESSAGE,
+                finished_at=datetime.utcnow(),
+            )
+        )
+        session.commit()
+        return result.rowcount
+
+
+def _run_job(
+    job_id: int, executivo_id: int, prospect_ids: list[str], filters: ProspectFilters
+) -> None:
+    _update_job(job_id, status=JOB_RUNNING, started_at=datetime.utcnow())
+
+    def report(processed: int, partial: AssignmentResult) -> None:
+        _update_job(
+            job_id,
+            processed=processed,
+            assigned=partial.assigned,
+            overwritten=partial.overwritten,
+            skipped_same_exec=partial.skipped_same_exec,
+        )
+
+    try:
+        result = assign_prospects(executivo_id, prospect_ids, filters, on_progress=report)
+    except Exception as exc:  # noqa: BLE001
+        _update_job(job_id, status=JOB_FAILED, error=str(exc), finished_at=datetime.utcnow())
+        return
+    _update_job(
+        job_id,
+        status=JOB_COMPLETED,
+        processed=result.total,
+        assigned=result.assigned,
+        overwritten=result.overwritten,
+        skipped_same_exec=result.skipped_same_exec,
+        finished_at=datetime.utcnow(),
+    )
+
+
+def submit_assignment_job(
+    executivo_id: int, prospect_ids: list[str], filters: ProspectFilters
+) -> int:
+    """Registra o job, agenda a execução e devolve o id sem esperar a carga."""
+    recover_interrupted_jobs()
+    with next(get_session()) as session:
+        job = AssignmentJob(
+            executivo_id=executivo_id,
+            filter_set_id=get_or_create_filter_set(session, filters),
+            status=JOB_PENDING,
+            total=len(prospect_ids),
+            owner=PROCESS_OWNER,
+        )
+        session.add(job)
+        session.commit()
+        job_id = job.id
+    _executor.submit(_run_job, job_id, executivo_id, list(prospect_ids), filters)
+    return job_id
+
+
+def get_assignment_job(job_id: int) -> AssignmentJob | None:
+    with next(get_session()) as session:
+        return session.get(AssignmentJob, job_id)
+
+
+def has_active_jobs() -> bool:
+    with next(get_session()) as session:
+        stmt = select(AssignmentJob.id).where(AssignmentJob.status.in_(ACTIVE_JOB_STATUSES))
+        return session.execute(stmt.limit(1)).first() is not None
+
+
+def list_assignment_jobs(limit: int = 5) -> list[AssignmentJob]:
+    """Jobs mais recentes primeiro."""
+    with next(get_session()) as session:
+        stmt = select(AssignmentJob).order_by(AssignmentJob.id.desc()).limit(limit)
+        return list(session.execute(stmt).scalars())
+
+
+def job_result(job: AssignmentJob) -> AssignmentResult:
+    """Contagens (parciais, enquanto o job roda) no formato de `assign_prospects`."""
+    return AssignmentResult(
+        total=job.processed,
+        assigned=job.assigned,
+        skipped_same_exec=job.skipped_same_exec,
+        overwritten=job.overwritten,
+    )
@@ -0,0 +1,81 @@
+"""Mapa coroplético de prospects por município.
+
+A geometria é estática por (UF, nível) e fica em uma `MunicipalityFeatureTable`
+construída uma única vez. A cada rerun só o vetor de contagens e as cores são
+recalculados com NumPy; as feições de saída apenas referenciam a geometria
+original, sem copiá-la nem alterá-la.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.services.geojson_service import feature_municipality_code, normalize_municipality_codes
+
+
+@dataclass(frozen=True)
+class MunicipalityFeatureTable:
+    codes: pd.Index
+    geometries: tuple[dict[str, Any], ...]
+
+
+def build_feature_table(geojson: dict[str, Any]) -> MunicipalityFeatureTable:
+    features = geojson.get("features", [])
+    return MunicipalityFeatureTable(
+        codes=pd.Index([feature_municipality_code(feature) for feature in features]),
+        geometries=tuple(feature.get("geometry") for feature in features),
+    )
+
+
+def municipality_counts_vector(
+    table: MunicipalityFeatureTable, counts: pd.Series
+) -> np.ndarray:
+    """Alinha `counts` (código IBGE -> prospects) à ordem das feições da tabela."""
+    prospects = np.zeros(len(table.codes), dtype=np.int64)
+    if counts.empty:
+        return prospects
+    codes = normalize_municipality_codes(counts.index.to_series())
+    grouped = pd.Series(counts.to_numpy(), index=codes.to_numpy()).groupby(level=0).sum()
+    positions = table.codes.get_indexer(grouped.index)
+    matched = positions >= 0
+    prospects[positions[matched]] = grouped.to_numpy()[matched]
+    return prospects
+
+
+def fill_colors(prospects: np.ndarray) -> np.ndarray:
+    """Cores RGBA (n x 4) proporcionais ao total de prospects de cada município."""
+    max_prospects = int(prospects.max()) if len(prospects) else 0
+    intensity = prospects / (max_prospects or 1)
+    colors = np.empty((len(prospects), 4), dtype=np.int64)
+    colors[:, 0] = 230 - (140 * intensity).astype(np.int64)
+    colors[:, 1] = 100 + (60 * intensity).astype(np.int64)
+    colors[:, 2] = 80
+    colors[:, 3] = np.where(prospects == 0, 50, 160)
+    return colors
+
+
+def build_choropleth_features(
+    table: MunicipalityFeatureTable, counts: pd.Series
+) -> dict[str, Any]:
+    """FeatureCollection do rerun: propriedades novas sobre a geometria compartilhada."""
+    prospects = municipality_counts_vector(table, counts)
+    colors = fill_colors(prospects).tolist()
+    features = [
+        {
+            "type": "Feature",
+            "geometry": geometry,
+            "properties": {
+                "prospects": count,
+                "codigo_ibge": code,
+                "fill_color": color,
+            },
+        }
+        for geometry, code, count, color in zip(
+            table.geometries, table.codes, prospects.tolist(), colors
+        )
+    ]
+    return {"type": "FeatureCollection", "features": features}
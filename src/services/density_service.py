@@ -0,0 +1,178 @@
+"""Agregação de densidade de prospects em grade hierárquica (quadkeys).
+
+Cada linha do snapshot recebe, uma única vez, a chave Morton do tile Web
+Mercator que a contém em `DENSITY_MAX_LEVEL`. Um nível mais grosso é só um
+deslocamento de bits dessa chave, de modo que agregar os prospects filtrados
+é um `np.unique` sobre inteiros. Os níveis grossos sem filtro ficam em cache
+no snapshot; o mapa recebe apenas as células dentro do viewport.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from src.repositories.cached_repository import CachedProspectsRepository
+from src.services.prospect_service import ProspectFilters, filter_positions
+
+DENSITY_MAX_LEVEL = 16
+DENSITY_CACHED_MAX_LEVEL = 10
+# Células de ~16 px: no zoom z do deck.gl o mundo tem 512 * 2**z pixels.
+DENSITY_LEVEL_OFFSET = 5
+MERCATOR_MAX_LATITUDE = 85.05112878
+INVALID_KEY = np.iinfo(np.uint64).max
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64) & np.uint64(0xFFFF)
+    values = (values | (values << np.uint64(8))) & np.uint64(0x00FF00FF)
+    values = (values | (values << np.uint64(4))) & np.uint64(0x0F0F0F0F)
+    values = (values | (values << np.uint64(2))) & np.uint64(0x33333333)
+    return (values | (values << np.uint64(1))) & np.uint64(0x55555555)
+
+
+def _compact_bits(values: np.ndarray) -> np.ndarray:
+    values = values & np.uint64(0x55555555)
+    values = (values | (values >> np.uint64(1))) & np.uint64(0x33333333)
+    values = (values | (values >> np.uint64(2))) & np.uint64(0x0F0F0F0F)
+    values = (values | (values >> np.uint64(4))) & np.uint64(0x00FF00FF)
+    return (values | (values >> np.uint64(8))) & np.uint64(0x0000FFFF)
+
+
+def _mercator(lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Posição Web Mercator normalizada em [0, 1] (y cresce para o sul)."""
+    sin_lat = np.sin(np.radians(np.clip(lat, -MERCATOR_MAX_LATITUDE, MERCATOR_MAX_LATITUDE)))
+    return (lon + 180.0) / 360.0, 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+
+
+def _mercator_inverse(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return x * 360.0 - 180.0, np.degrees(np.arctan(np.sinh(math.pi * (1 - 2 * y))))
+
+
+def tile_coordinates(
+    lon: np.ndarray, lat: np.ndarray, level: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Coordenadas (x, y) do tile Web Mercator de cada ponto no nível `level`."""
+    scale = 2**level
+    x, y = _mercator(lon, lat)
+    return np.clip(np.floor(x * scale), 0, scale - 1), np.clip(np.floor(y * scale), 0, scale - 1)
+
+
+def tile_centers(x: np.ndarray, y: np.ndarray, level: int) -> tuple[np.ndarray, np.ndarray]:
+    return _mercator_inverse((x + 0.5) / 2**level, (y + 0.5) / 2**level)
+
+
+def quadkeys(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Chave Morton de cada ponto em `DENSITY_MAX_LEVEL`; inválidos recebem `INVALID_KEY`."""
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    valid = np.isfinite(lon) & np.isfinite(lat) & (np.abs(lon) <= 180)
+    x, y = tile_coordinates(np.where(valid, lon, 0.0), np.where(valid, lat, 0.0), DENSITY_MAX_LEVEL)
+    keys = _spread_bits(x) | (_spread_bits(y) << np.uint64(1))
+    return np.where(valid, keys, INVALID_KEY)
+
+
+def decode_quadkeys(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return _compact_bits(keys), _compact_bits(keys >> np.uint64(1))
+
+
+def density_level(zoom: float) -> int:
+    return int(min(max(round(zoom) + DENSITY_LEVEL_OFFSET, 0), DENSITY_MAX_LEVEL))
+
+
+@dataclass(frozen=True)
+class Viewport:
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+
+    @classmethod
+    def from_view_state(
+        cls, latitude: float, longitude: float, zoom: float, width: int = 1200, height: int = 600
+    ) -> Viewport:
+        """Área visível de um mapa `width` x `height` px centrado em (latitude, longitude)."""
+        world = 512 * 2**zoom
+        center_x, center_y = _mercator(np.array([longitude]), np.array([latitude]))
+        half_x = width / 2 / world
+        half_y = height / 2 / world
+        min_lon, min_lat = _mercator_inverse(
+            np.clip(center_x - half_x, 0, 1), np.clip(center_y + half_y, 0, 1)
+        )
+        max_lon, max_lat = _mercator_inverse(
+            np.clip(center_x + half_x, 0, 1), np.clip(center_y - half_y, 0, 1)
+        )
+        return cls(
+            min_lon=float(min_lon[0]),
+            min_lat=float(min_lat[0]),
+            max_lon=float(max_lon[0]),
+            max_lat=float(max_lat[0]),
+        )
+
+
+@dataclass
+class DensityGrid:
+    keys: np.ndarray
+    _coarse: dict[int, tuple[np.ndarray, np.ndarray]] = field(default_factory=dict, repr=False)
+
+    def cell_counts(
+        self, level: int, positions: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Chaves e contagens das células com prospects no nível `level`."""
+        if positions is None and level <= DENSITY_CACHED_MAX_LEVEL:
+            if level not in self._coarse:
+                self._coarse[level] = self._count(self.keys, level)
+            return self._coarse[level]
+        keys = self.keys if positions is None else self.keys[positions]
+        return self._count(keys, level)
+
+    @staticmethod
+    def _count(keys: np.ndarray, level: int) -> tuple[np.ndarray, np.ndarray]:
+        keys = keys[keys != INVALID_KEY] >> np.uint64(2 * (DENSITY_MAX_LEVEL - level))
+        return np.unique(keys, return_counts=True)
+
+    def aggregate(
+        self,
+        level: int,
+        viewport: Viewport | None = None,
+        positions: np.ndarray | None = None,
+    ) -> pd.DataFrame:
+        """Centro e total de prospects de cada célula visível (colunas lon, lat, count)."""
+        keys, counts = self.cell_counts(level, positions)
+        x, y = decode_quadkeys(keys)
+        if viewport is not None:
+            min_x, max_y = tile_coordinates(
+                np.array([viewport.min_lon]), np.array([viewport.min_lat]), level
+            )
+            max_x, min_y = tile_coordinates(
+                np.array([viewport.max_lon]), np.array([viewport.max_lat]), level
+            )
+            visible = (x >= min_x[0]) & (x <= max_x[0]) & (y >= min_y[0]) & (y <= max_y[0])
+            x, y, counts = x[visible], y[visible], counts[visible]
+        lon, lat = tile_centers(x.astype(float), y.astype(float), level)
+        return pd.DataFrame({"lon": lon, "lat": lat, "count": counts})
+
+
+def build_density_grid(df: pd.DataFrame) -> DensityGrid:
+    return DensityGrid(
+        keys=quadkeys(
+            pd.to_numeric(df["long"], errors="coerce").to_numpy(dtype=float),
+            pd.to_numeric(df["lat"], errors="coerce").to_numpy(dtype=float),
+        )
+    )
+
+
+def prospect_density(
+    repo: CachedProspectsRepository,
+    filters: ProspectFilters,
+    zoom: float,
+    viewport: Viewport | None = None,
+) -> pd.DataFrame:
+    """Células de densidade dos prospects filtrados para o zoom e o viewport do mapa."""
+    snapshot = repo.snapshot()
+    grid = snapshot.derive("density_grid", build_density_grid)
+    positions = filter_positions(repo, filters, snapshot)
+    return grid.aggregate(density_level(zoom), viewport, positions)
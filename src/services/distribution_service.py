@@ -0,0 +1,209 @@
+"""Distribuição automática dos prospects filtrados entre vários executivos.
+
+A alocação é calculada em uma passada vetorizada: primeiro as cotas de cada
+executivo (iguais, proporcionais à capacidade ou por afinidade de região),
+depois a sequência intercalada de executivos é aplicada aos prospects na
+ordem do DataFrame. A gravação usa `assign_allocation`, em uma transação.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.models.executive import Executive
+from src.services.prospect_service import AssignmentResult, ProspectFilters, assign_allocation
+
+ROUND_ROBIN = "round_robin"
+WEIGHTED = "weighted"
+REGION_FIRST = "region_first"
+DISTRIBUTION_STRATEGIES = (ROUND_ROBIN, WEIGHTED, REGION_FIRST)
+
+REGION_UFS = {
+    "norte": ("AC", "AM", "AP", "PA", "RO", "RR", "TO"),
+    "nordeste": ("AL", "BA", "CE", "MA", "PB", "PE", "PI", "RN", "SE"),
+    "centro-oeste": ("DF", "GO", "MS", "MT"),
+    "sudeste": ("ES", "MG", "RJ", "SP"),
+    "sul": ("PR", "RS", "SC"),
+}
+UF_REGIONS = {uf: region for region, ufs in REGION_UFS.items() for uf in ufs}
+
+
+@dataclass(frozen=True)
+class ExecutiveSlot:
+    id: int
+    regiao: str | None = None
+    capacity: int | None = None
+
+
+@dataclass
+class DistributionPlan:
+    """Prospects (`cnpj_cpf`) e o executivo escolhido para cada um."""
+
+    allocation: pd.DataFrame
+    unallocated: int
+
+    def counts(self) -> pd.Series:
+        return self.allocation["executivo_id"].value_counts().sort_index()
+
+
+def executive_slots(
+    executives: Iterable[Executive], capacities: dict[int, int | None] | None = None
+) -> list[ExecutiveSlot]:
+    capacities = capacities or {}
+    return [
+        ExecutiveSlot(
+            id=executive.id, regiao=executive.regiao, capacity=capacities.get(executive.id)
+        )
+        for executive in executives
+    ]
+
+
+def _normalize_region(value: str | None) -> str:
+    text = unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode()
+    return text.strip().casefold().replace(" ", "-")
+
+
+def region_matches(regiao: str | None, ufs: pd.Series) -> np.ndarray:
+    """Prospects cuja UF (ou a macrorregião da UF) corresponde à região do executivo."""
+    region = _normalize_region(regiao)
+    if not region:
+        return np.zeros(len(ufs), dtype=bool)
+    ufs = ufs.astype(str).str.upper()
+    return ((ufs.str.casefold() == region) | (ufs.map(UF_REGIONS) == region)).to_numpy()
+
+
+def _balanced_quotas(total: int, capacities: np.ndarray) -> np.ndarray:
+    """Divide `total` o mais igualmente possível sem passar das capacidades (-1 = sem limite)."""
+    quotas = np.zeros(len(capacities), dtype=np.int64)
+    remaining = total
+    open_slots = np.flatnonzero(capacities != 0)
+    while remaining > 0 and len(open_slots):
+        share, extra = divmod(remaining, len(open_slots))
+        wanted = np.full(len(open_slots), share, dtype=np.int64)
+        wanted[:extra] += 1
+        slot_capacities = capacities[open_slots]
+        room = np.where(slot_capacities < 0, remaining, slot_capacities - quotas[open_slots])
+        granted = np.minimum(wanted, room)
+        quotas[open_slots] += granted
+        remaining -= int(granted.sum())
+        open_slots = open_slots[(slot_capacities < 0) | (quotas[open_slots] < slot_capacities)]
+        if not granted.any():
+            break
+    return quotas
+
+
+def _weighted_quotas(total: int, capacities: np.ndarray) -> np.ndarray:
+    """Cotas proporcionais à capacidade (maiores restos); sem capacidade vale a média."""
+    limited = capacities >= 0
+    if limited.all() and capacities.sum() <= total:
+        return capacities.astype(np.int64)
+    mean_capacity = capacities[limited].mean() if limited.any() else 1.0
+    weights = np.where(limited, capacities, mean_capacity).astype(float)
+    if weights.sum() == 0:
+        return np.zeros(len(capacities), dtype=np.int64)
+    exact = total * weights / weights.sum()
+    quotas = np.floor(exact).astype(np.int64)
+    quotas[np.argsort(-(exact - quotas), kind="stable")[: total - int(quotas.sum())]] += 1
+    quotas = np.where(limited, np.minimum(quotas, capacities), quotas)
+    # O que a capacidade cortou é redistribuído igualmente entre quem ainda tem espaço.
+    room = np.where(limited, capacities - quotas, -1)
+    return quotas + _balanced_quotas(total - int(quotas.sum()), room)
+
+
+def _interleave(quotas: np.ndarray) -> np.ndarray:
+    """Índices de executivo em rodízio (A, B, C, A, B, C, ...) até esgotar as cotas."""
+    owners = np.repeat(np.arange(len(quotas)), quotas)
+    ranks = np.arange(len(owners)) - np.repeat(np.cumsum(quotas) - quotas, quotas)
+    return owners[np.lexsort((owners, ranks))]
+
+
+def _capacity_array(slots: Sequence[ExecutiveSlot]) -> np.ndarray:
+    return np.array(
+        [-1 if slot.capacity is None else max(int(slot.capacity), 0) for slot in slots],
+        dtype=np.int64,
+    )
+
+
+def _allocate(count: int, capacities: np.ndarray, strategy: str) -> np.ndarray:
+    if strategy == WEIGHTED:
+        quotas = _weighted_quotas(count, capacities)
+    else:
+        quotas = _balanced_quotas(count, capacities)
+    return _interleave(quotas)
+
+
+def plan_distribution(
+    prospects: pd.DataFrame,
+    executives: Sequence[ExecutiveSlot],
+    strategy: str = ROUND_ROBIN,
+) -> DistributionPlan:
+    """Escolhe um executivo para cada prospect único de `prospects`.
+
+    - `round_robin`: cotas iguais, limitadas pela capacidade;
+    - `weighted`: cotas proporcionais à capacidade;
+    - `region_first`: cada prospect vai primeiro para os executivos da sua
+      UF/macrorregião; o restante é dividido em rodízio entre todos.
+
+    Prospects além da capacidade total ficam sem executivo (`unallocated`).
+    """
+    if strategy not in DISTRIBUTION_STRATEGIES:
+        raise ValueError(f"Estratégia de distribuição desconhecida: {strategy}")
+
+    unique = prospects.dropna(subset=["cnpj_cpf"]).drop_duplicates("cnpj_cpf")
+    owner = np.full(len(unique), -1, dtype=np.int64)
+    capacities = _capacity_array(executives)
+    if not executives or unique.empty:
+        return DistributionPlan(
+            allocation=pd.DataFrame({"cnpj_cpf": [], "executivo_id": []}),
+            unallocated=len(unique),
+        )
+
+    if strategy == REGION_FIRST and "unidade_federal" in unique.columns:
+        # A afinidade é calculada por UF distinta (poucas dezenas) e não por linha;
+        # o código -1 (UF nula) cai na última linha, sem nenhum executivo.
+        codes, uf_values = pd.factorize(unique["unidade_federal"], use_na_sentinel=True)
+        uf_series = pd.Series(uf_values)
+        matches = np.column_stack(
+            [region_matches(slot.regiao, uf_series) for slot in executives]
+        )
+        matches = np.vstack([matches, np.zeros(len(executives), dtype=bool)])
+        # Prospects cujas UFs casam com o mesmo conjunto de executivos formam um grupo.
+        group_keys, uf_groups = np.unique(matches, axis=0, return_inverse=True)
+        groups = uf_groups.ravel()[codes]
+        for group, key in enumerate(group_keys):
+            candidates = np.flatnonzero(key)
+            if not len(candidates):
+                continue
+            rows = np.flatnonzero(groups == group)
+            sequence = candidates[_allocate(len(rows), capacities[candidates], ROUND_ROBIN)]
+            owner[rows[: len(sequence)]] = sequence
+            used = np.bincount(sequence, minlength=len(executives))
+            capacities = np.where(capacities < 0, capacities, capacities - used)
+
+    pending = np.flatnonzero(owner < 0)
+    sequence = _allocate(len(pending), capacities, strategy)
+    owner[pending[: len(sequence)]] = sequence
+
+    executive_ids = np.array([slot.id for slot in executives], dtype=np.int64)
+    allocated = owner >= 0
+    allocation = pd.DataFrame(
+        {
+            "cnpj_cpf": unique["cnpj_cpf"].astype(str).to_numpy()[allocated],
+            "executivo_id": executive_ids[owner[allocated]],
+        }
+    )
+    return DistributionPlan(allocation=allocation, unallocated=int((~allocated).sum()))
+
+
+def distribute_prospects(plan: DistributionPlan, filters: ProspectFilters) -> AssignmentResult:
+    """Grava o plano em uma única transação, com log em `distribution_logs`."""
+    return assign_allocation(
+        plan.allocation["cnpj_cpf"].tolist(),
+        plan.allocation["executivo_id"].astype(int).tolist(),
+        filters,
+    )
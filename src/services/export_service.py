@@ -0,0 +1,213 @@
+"""Exportação da carteira atual e dos logs de distribuição em CSV ou Parquet.
+
+Os registros são lidos do banco em blocos (`yield_per`), recebem os atributos
+do prospect (lidos da fonte só para os `cnpj_cpf` do bloco, ou do snapshot em
+memória no app) e são gravados bloco a bloco: o CSV por `to_csv` em modo
+append e o Parquet como um row group por bloco em um `ParquetWriter`. A memória fica limitada a um bloco, qualquer que seja o total.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.repositories.cached_repository import CachedProspectsRepository
+from src.repositories.prospects_repository import ProspectsRepository
+from src.services.prospect_service import (
+    DEFAULT_RECORD_CHUNK_SIZE,
+    ProspectFilters,
+    iter_assignments,
+    iter_distribution_logs,
+)
+
+EXPORT_ASSIGNMENTS = "carteira"
+EXPORT_DISTRIBUTION_LOGS = "distribuicoes"
+EXPORT_KINDS = (EXPORT_ASSIGNMENTS, EXPORT_DISTRIBUTION_LOGS)
+EXPORT_FORMATS = ("csv", "parquet")
+PROSPECT_INFO_COLUMNS = (
+    "razao_social",
+    "nome_fantasia",
+    "nm_razao_social",
+    "nm_fantasia",
+    "segmento",
+    "unidade_federal",
+)
+
+
+@dataclass(frozen=True)
+class ProspectAttributes:
+    """Atributos de cada `cnpj_cpf` distinto (a última linha do dataset)."""
+
+    keys: pd.Index
+    frame: pd.DataFrame
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, columns: Sequence[str]) -> ProspectAttributes:
+        unique = df[["cnpj_cpf", *columns]].drop_duplicates("cnpj_cpf", keep="last")
+        frame = unique[list(columns)].reset_index(drop=True)
+        for column in frame.columns:
+            if isinstance(frame[column].dtype, pd.CategoricalDtype):
+                frame[column] = frame[column].astype(object)
+        return cls(keys=pd.Index(unique["cnpj_cpf"].astype(str)), frame=frame)
+
+    def enrich(self, records: pd.DataFrame) -> pd.DataFrame:
+        positions = self.keys.get_indexer(records["cnpj_cpf"].astype(str))
+        # Posição -1 (prospect fora do dataset) vira uma linha de nulos.
+        attributes = self.frame.reindex(positions).set_axis(records.index)
+        return pd.concat([records, attributes], axis=1)
+
+
+def prospect_attributes(
+    repo: ProspectsRepository,
+    columns: Sequence[str] = PROSPECT_INFO_COLUMNS,
+    prospect_ids: pd.Series | None = None,
+) -> ProspectAttributes | None:
+    """Atributos dos prospects; `prospect_ids` restringe a leitura da fonte a esses ids.
+
+    Com o repositório em cache, a estrutura é derivada uma vez do snapshot e
+    `prospect_ids` é ignorado.
+    """
+    available = [column for column in columns if column in repo.column_names()]
+    if not available:
+        return None
+    if isinstance(repo, CachedProspectsRepository):
+        return repo.snapshot().derive(
+            f"export_attributes:{','.join(available)}",
+            lambda frame: ProspectAttributes.build(frame, available),
+        )
+
+    filters = None
+    if prospect_ids is not None:
+        ids = prospect_ids.dropna().astype(str).unique().tolist()
+        if not ids:
+            empty = pd.DataFrame(columns=["cnpj_cpf", *available])
+            return ProspectAttributes.build(empty, available)
+        filters = ProspectFilters(cnpj_cpf=ids)
+    return ProspectAttributes.build(
+        repo.load(filters=filters, columns=["cnpj_cpf", *available]), available
+    )
+
+
+def _with_executive_names(records: pd.DataFrame, executive_map: dict[int, str]) -> pd.DataFrame:
+    names = {"executivo_id": "executivo", "previous_executivo_id": "executivo_anterior"}
+    for column, name in names.items():
+        if column in records.columns:
+            position = records.columns.get_loc(column) + 1
+            records.insert(position, name, records[column].map(executive_map))
+    return records
+
+
+def _text_columns(records: pd.DataFrame) -> pd.DataFrame:
+    """Texto como `string`, para que o schema Parquet não dependa do primeiro bloco."""
+    for column in records.columns:
+        if records[column].dtype == object:
+            records[column] = records[column].astype("string")
+    return records
+
+
+def export_chunks(
+    kind: str,
+    repo: ProspectsRepository | None = None,
+    executive_map: dict[int, str] | None = None,
+    executivo_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    chunk_size: int = DEFAULT_RECORD_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Blocos de registros prontos para gravação, já com os atributos do prospect."""
+    if kind == EXPORT_ASSIGNMENTS:
+        chunks = iter_assignments(executivo_id, start, end, chunk_size)
+    elif kind == EXPORT_DISTRIBUTION_LOGS:
+        chunks = iter_distribution_logs(executivo_id, start, end, chunk_size)
+    else:
+        raise ValueError(f"Exportação desconhecida: {kind}")
+
+    cached = isinstance(repo, CachedProspectsRepository)
+    attributes = prospect_attributes(repo) if cached else None
+    for records in chunks:
+        if executive_map is not None:
+            records = _with_executive_names(records, executive_map)
+        if repo is not None and not cached:
+            # Sem snapshot em memória, lê da fonte só os prospects do bloco.
+            attributes = prospect_attributes(repo, prospect_ids=records["cnpj_cpf"])
+        if attributes is not None:
+            records = attributes.enrich(records)
+        yield _text_columns(records)
+
+
+def _empty_export(kind: str) -> pd.DataFrame:
+    columns = {
+        "id": "Int64",
+        "assigned_at": "datetime64[ns]",
+        "cnpj_cpf": "string",
+        "executivo_id": "Int64",
+    }
+    if kind == EXPORT_DISTRIBUTION_LOGS:
+        columns["previous_executivo_id"] = "Int64"
+    columns |= {"mes_ref": "string", "filters_json": "string"}
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in columns.items()})
+
+
+def write_export(
+    chunks: Iterator[pd.DataFrame],
+    destination: Path | BinaryIO,
+    fmt: str,
+    kind: str = EXPORT_ASSIGNMENTS,
+) -> int:
+    """Grava os blocos em `destination` (caminho ou arquivo) e devolve o total de linhas."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+    rows = 0
+    writer: pq.ParquetWriter | None = None
+    handle = open(destination, "wb") if isinstance(destination, Path) else destination
+    try:
+        for records in chunks:
+            if fmt == "csv":
+                handle.write(records.to_csv(index=False, header=rows == 0).encode("utf-8"))
+            else:
+                table = pa.Table.from_pandas(records, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(handle, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            rows += len(records)
+
+        if rows == 0:
+            # Arquivo vazio ainda traz o cabeçalho/schema das colunas básicas.
+            empty = _empty_export(kind)
+            if fmt == "csv":
+                handle.write(empty.to_csv(index=False).encode("utf-8"))
+            else:
+                pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), handle)
+    finally:
+        if writer is not None:
+            writer.close()
+        if isinstance(destination, Path):
+            handle.close()
+    return rows
+
+
+def export_records(
+    kind: str,
+    destination: Path | BinaryIO,
+    fmt: str,
+    repo: ProspectsRepository | None = None,
+    executive_map: dict[int, str] | None = None,
+    executivo_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    chunk_size: int = DEFAULT_RECORD_CHUNK_SIZE,
+) -> int:
+    chunks = export_chunks(kind, repo, executive_map, executivo_id, start, end, chunk_size)
+    return write_export(chunks, destination, fmt, kind)
+
+
+def export_file_name(kind: str, fmt: str, executivo_id: int | None = None) -> str:
+    suffix = f"_executivo_{executivo_id}" if executivo_id else ""
+    return f"{kind}{suffix}_{datetime.now():%Y%m%d_%H%M}.{fmt}"
@@ -0,0 +1,104 @@
+"""Cache LRU das linhas selecionadas por cada combinação de filtros.
+
+A chave combina a fonte, a versão do dataset e o hash canônico dos filtros
+(mesma normalização de `filter_sets`: listas ordenadas, vazio igual a None).
+Guarda apenas os arrays de posições, limitados por um orçamento de bytes;
+o DataFrame sai de um único `take` sobre o snapshot.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
+
+import numpy as np
+
+FILTER_CACHE_MAX_BYTES = 128 * 1024**2
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class PositionsCache:
+    def __init__(self, max_bytes: int = FILTER_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> np.ndarray | None:
+        with self._lock:
+            positions = self._entries.get(key)
+            if positions is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return positions
+
+    def put(self, key: Hashable, positions: np.ndarray) -> np.ndarray:
+        """Guarda uma cópia somente leitura (int32 quando cabe) e a devolve."""
+        if len(positions) == 0 or positions.max() < np.iinfo(np.int32).max:
+            positions = positions.astype(np.int32)
+        positions.flags.writeable = False
+        if positions.nbytes > self.max_bytes:
+            return positions
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = positions
+            self._bytes += positions.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._evictions += 1
+        return positions
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+
+_FILTER_RESULTS = PositionsCache()
+
+
+def filter_results_cache() -> PositionsCache:
+    return _FILTER_RESULTS
+
+
+def filter_cache_stats() -> CacheStats:
+    return _FILTER_RESULTS.stats()
+
+
+def clear_filter_cache() -> None:
+    _FILTER_RESULTS.clear()
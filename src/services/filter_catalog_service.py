@@ -0,0 +1,149 @@
+"""Catálogo de opções dos filtros da sidebar.
+
+Guarda, para cada coluna filtrável, os valores distintos (ordenados) e o total
+de prospects de cada um em um JSON ao lado do dataset. Para cada UF guarda
+também quais desses valores ocorrem nela, para que a sidebar mostre só as
+opções da UF selecionada. O catálogo é refeito apenas quando a versão do
+dataset muda, e a sidebar lê dele em vez de varrer o DataFrame a cada rerun.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Hashable, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Muda quando o formato do JSON muda; catálogos de outro formato são refeitos.
+CATALOG_FORMAT = 2
+SCOPE_COLUMN = "unidade_federal"
+
+
+@dataclass(frozen=True)
+class FilterCatalog:
+    version: Any
+    columns: dict[str, dict[str, list[Any]]]
+    # Valor da UF -> coluna -> índices (em `values`) das opções presentes na UF.
+    scopes: dict[str, dict[str, list[int]]] = field(default_factory=dict)
+
+    def options(self, column: str, scope: Sequence[Any] | None = None) -> list[Any]:
+        """Opções da coluna; com `scope`, só as que ocorrem nas UFs informadas."""
+        values = self.columns.get(column, {}).get("values", [])
+        if not scope or column == SCOPE_COLUMN:
+            return list(values)
+        positions = sorted(
+            {
+                position
+                for scope_value in scope
+                for position in self.scopes.get(str(scope_value), {}).get(column, [])
+            }
+        )
+        return [values[position] for position in positions]
+
+    def counts(self, column: str) -> dict[Any, int]:
+        entry = self.columns.get(column, {})
+        return dict(zip(entry.get("values", []), entry.get("counts", [])))
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "format": CATALOG_FORMAT,
+                "version": self.version,
+                "columns": self.columns,
+                "scopes": self.scopes,
+            },
+            ensure_ascii=False,
+        )
+
+
+def catalog_path(dataset_path: Path) -> Path:
+    name = dataset_path.stem if dataset_path.suffix else dataset_path.name
+    return dataset_path.parent / f"{name}.catalog.json"
+
+
+def _json_version(version: Hashable) -> Any:
+    return list(version) if isinstance(version, tuple) else version
+
+
+def build_filter_catalog(
+    df: pd.DataFrame, columns: Sequence[str], version: Hashable
+) -> FilterCatalog:
+    catalog: dict[str, dict[str, list[Any]]] = {}
+    scopes: dict[str, dict[str, list[int]]] = {}
+    scope_codes, scope_values = (
+        pd.factorize(df[SCOPE_COLUMN], use_na_sentinel=True)
+        if SCOPE_COLUMN in df.columns
+        else (None, None)
+    )
+    for column in columns:
+        if column not in df.columns:
+            continue
+        counts = df[column].value_counts(dropna=True, sort=False)
+        counts = counts[counts > 0].sort_index()
+        catalog[column] = {
+            "values": counts.index.tolist(),
+            "counts": [int(count) for count in counts.to_numpy()],
+        }
+        if scope_codes is None or column == SCOPE_COLUMN:
+            continue
+        value_codes = counts.index.get_indexer(df[column])
+        present = (scope_codes >= 0) & (value_codes >= 0)
+        # Pares (UF, opção) distintos em uma passada, codificados como um único inteiro.
+        pairs = np.unique(scope_codes[present] * len(counts) + value_codes[present])
+        for scope_code, positions in _split_pairs(pairs, len(counts)):
+            scopes.setdefault(str(scope_values[scope_code]), {})[column] = positions
+    return FilterCatalog(version=_json_version(version), columns=catalog, scopes=scopes)
+
+
+def _split_pairs(pairs: np.ndarray, width: int) -> list[tuple[int, list[int]]]:
+    scope_codes, positions = np.divmod(pairs, max(width, 1))
+    starts = np.flatnonzero(np.r_[True, scope_codes[1:] != scope_codes[:-1]])
+    ends = np.r_[starts[1:], len(pairs)]
+    return [
+        (int(scope_codes[start]), positions[start:end].tolist())
+        for start, end in zip(starts, ends)
+    ]
+
+
+def load_filter_catalog(path: Path, version: Hashable) -> FilterCatalog | None:
+    """Catálogo gravado em `path`, ou None se não existe ou é de outra versão."""
+    if not path.exists():
+        return None
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if payload.get("format") != CATALOG_FORMAT or payload.get("version") != _json_version(version):
+        return None
+    return FilterCatalog(
+        version=payload["version"],
+        columns=payload.get("columns", {}),
+        scopes=payload.get("scopes", {}),
+    )
+
+
+def write_filter_catalog(path: Path, catalog: FilterCatalog) -> None:
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(catalog.to_json(), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def get_filter_catalog(
+    df: pd.DataFrame,
+    columns: Sequence[str],
+    version: Hashable,
+    path: Path | None = None,
+) -> FilterCatalog:
+    """Lê o catálogo de `path` ou o reconstrói a partir de `df` e o grava."""
+    if path is not None:
+        catalog = load_filter_catalog(path, version)
+        if catalog is not None:
+            return catalog
+    catalog = build_filter_catalog(df, columns, version)
+    if path is not None:
+        write_filter_catalog(path, catalog)
+    return catalog
@@ -1,19 +1,27 @@
-from __future__ import annotations
-
 """Serviços para baixar e converter as malhas territoriais do IBGE.
 
 O IBGE disponibiliza as geometrias municipais em um arquivo ZIP contendo
 Shapefile (SHP/DBF/SHX). Este módulo baixa o ZIP, identifica os componentes
 necessários, respeita a codificação definida pelo CPG quando disponível e
-converte as feições para GeoJSON para uso no mapa do Streamlit.
+converte as feições para GeoJSON para uso no mapa do Streamlit. Download e
+conversão são feitos em streaming, com memória constante em relação ao
+tamanho da malha.
 """
 
-import io
+from __future__ import annotations
+
 import json
+import os
+import shutil
+import tempfile
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 
+import numpy as np
+import pandas as pd
 import requests
 import shapefile
 
@@ -23,6 +31,60 @@ IBGE_MUNICIPALITIES_ZIP_URL = (
 )
 
 GEOJSON_FILENAME = "municipalities.geojson"
+MISSING_GEOJSON_MESSAGE = (
+    "Arquivo municipalities.geojson não encontrado. "
+    "Execute o script scripts/download_geojson.py antes de usar o app."
+)
+
+# Tolerâncias do Douglas–Peucker em graus (0.001° ≈ 110 m no equador).
+GEOMETRY_LEVELS = {
+    "low": 0.02,
+    "medium": 0.005,
+    "high": 0.001,
+}
+# Zoom máximo (exclusivo) do pydeck atendido por cada nível; acima usa a malha completa.
+GEOMETRY_LEVEL_MAX_ZOOM = (
+    (6.0, "low"),
+    (9.0, "medium"),
+    (12.0, "high"),
+)
+COORDINATE_DECIMALS = 5
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+SHARDS_DIRNAME = "municipalities"
+SHARD_INDEX_FILENAME = f"{SHARDS_DIRNAME}/index.json"
+
+# Prefixo de 2 dígitos do código IBGE de município (CD_MUN) por UF.
+UF_IBGE_PREFIXES = {
+    "RO": "11",
+    "AC": "12",
+    "AM": "13",
+    "RR": "14",
+    "PA": "15",
+    "AP": "16",
+    "TO": "17",
+    "MA": "21",
+    "PI": "22",
+    "CE": "23",
+    "RN": "24",
+    "PB": "25",
+    "PE": "26",
+    "AL": "27",
+    "SE": "28",
+    "BA": "29",
+    "MG": "31",
+    "ES": "32",
+    "RJ": "33",
+    "SP": "35",
+    "PR": "41",
+    "SC": "42",
+    "RS": "43",
+    "MS": "50",
+    "MT": "51",
+    "GO": "52",
+    "DF": "53",
+}
+IBGE_PREFIX_TO_UF = {prefix: uf for uf, prefix in UF_IBGE_PREFIXES.items()}
 
 MUNICIPALITY_CODE_KEYS = (
     "CD_MUN",
@@ -42,6 +104,117 @@ def normalize_municipality_code(value: Any) -> str:
     return value
 
 
+def geometry_filename(level: str | None = None) -> str:
+    if level is None:
+        return GEOJSON_FILENAME
+    if level not in GEOMETRY_LEVELS:
+        raise ValueError(f"Nível de geometria desconhecido: {level}")
+    return f"municipalities_{level}.geojson"
+
+
+def shard_filename(prefix: str, level: str | None = None) -> str:
+    return f"{SHARDS_DIRNAME}/{level or 'full'}/{prefix}.geojson"
+
+
+def select_geometry_level(zoom: float) -> str | None:
+    """Nível simplificado adequado ao zoom do mapa (None = resolução completa)."""
+    for max_zoom, level in GEOMETRY_LEVEL_MAX_ZOOM:
+        if zoom < max_zoom:
+            return level
+    return None
+
+
+def _douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[start + 1 : end]
+        origin = points[start]
+        direction = points[end] - origin
+        length = np.hypot(direction[0], direction[1])
+        if length == 0:
+            distances = np.hypot(segment[:, 0] - origin[0], segment[:, 1] - origin[1])
+        else:
+            distances = np.abs(
+                direction[0] * (segment[:, 1] - origin[1])
+                - direction[1] * (segment[:, 0] - origin[0])
+            ) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+
+def _quantize(points: np.ndarray, decimals: int) -> np.ndarray:
+    points = np.round(points, decimals)
+    if len(points) < 2:
+        return points
+    changed = np.any(np.diff(points, axis=0) != 0, axis=1)
+    return points[np.concatenate(([True], changed))]
+
+
+def _simplify_ring(
+    ring: Iterable[Iterable[float]], tolerance: float, decimals: int, exterior: bool
+) -> list[list[float]] | None:
+    points = np.asarray(ring, dtype=float)
+    if len(points) < 4:
+        return points.tolist() if exterior else None
+    simplified = _quantize(_douglas_peucker(points, tolerance), decimals)
+    if len(simplified) >= 4:
+        return simplified.tolist()
+    # Anéis que colapsam: furos somem, contornos mantêm a forma original.
+    return _quantize(points, decimals).tolist() if exterior else None
+
+
+def _simplify_polygon(
+    rings: list[Any], tolerance: float, decimals: int
+) -> list[list[list[float]]]:
+    simplified = []
+    for position, ring in enumerate(rings):
+        result = _simplify_ring(ring, tolerance, decimals, exterior=position == 0)
+        if result is not None:
+            simplified.append(result)
+    return simplified
+
+
+def simplify_geometry(
+    geometry: dict[str, Any], tolerance: float, decimals: int = COORDINATE_DECIMALS
+) -> dict[str, Any]:
+    """Simplifica Polygon/MultiPolygon com Douglas–Peucker e quantiza as coordenadas."""
+    geometry_type = geometry.get("type")
+    if geometry_type == "Polygon":
+        coordinates = _simplify_polygon(geometry["coordinates"], tolerance, decimals)
+    elif geometry_type == "MultiPolygon":
+        coordinates = [
+            _simplify_polygon(polygon, tolerance, decimals)
+            for polygon in geometry["coordinates"]
+        ]
+    else:
+        return geometry
+    return {"type": geometry_type, "coordinates": coordinates}
+
+
+def normalize_municipality_codes(values: pd.Series) -> pd.Series:
+    """Versão vetorizada de `normalize_municipality_code` para uma série."""
+    codes = values.astype(str).str.strip()
+    codes = codes.str.replace(r"^(\d+)\.0$", r"\1", regex=True)
+    short_digits = codes.str.isdigit() & (codes.str.len() < 7)
+    codes = codes.mask(short_digits, codes.str.zfill(7))
+    return codes.mask(values.isna(), "")
+
+
+def feature_municipality_code(feature: dict[str, Any]) -> str:
+    properties = feature.get("properties") or {}
+    return normalize_municipality_code(feature.get("id")) or _extract_municipality_code(properties)
+
+
 def _extract_municipality_code(properties: dict[str, Any]) -> str:
     for key in MUNICIPALITY_CODE_KEYS:
         if key in properties:
@@ -75,81 +248,313 @@ def _read_cpg_encoding(zip_file: zipfile.ZipFile, cpg_name: str | None) -> str |
     return encoding or None
 
 
-def _load_shapefile_from_zip(zip_path: Path) -> shapefile.Reader:
+@dataclass(frozen=True)
+class ShapefilePaths:
+    shp: Path
+    dbf: Path
+    shx: Path
+    encoding: str
+
+
+def _download_zip(url: str, zip_path: Path) -> Path:
+    """Baixa o ZIP em blocos direto para o disco, sem manter o conteúdo em memória."""
+    tmp_path = zip_path.with_suffix(".zip.part")
+    with requests.get(url, timeout=120, stream=True) as response:
+        response.raise_for_status()
+        with tmp_path.open("wb") as zip_file:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                zip_file.write(chunk)
+    os.replace(tmp_path, zip_path)
+    return zip_path
+
+
+def _extract_shapefile(zip_path: Path, work_dir: Path) -> ShapefilePaths:
+    work_dir.mkdir(parents=True, exist_ok=True)
     with zipfile.ZipFile(zip_path) as zip_file:
         names = zip_file.namelist()
         shp_name, dbf_name, shx_name, cpg_name = _select_shapefile_components(names)
         encoding = _read_cpg_encoding(zip_file, cpg_name) or "latin-1"
 
-        shp_bytes = zip_file.read(shp_name)
-        dbf_bytes = zip_file.read(dbf_name)
-        shx_bytes = zip_file.read(shx_name)
-
-    return shapefile.Reader(
-        shp=io.BytesIO(shp_bytes),
-        dbf=io.BytesIO(dbf_bytes),
-        shx=io.BytesIO(shx_bytes),
+        extracted = {}
+        for name in (shp_name, dbf_name, shx_name):
+            target = work_dir / Path(name).name
+            with zip_file.open(name) as source, target.open("wb") as destination:
+                shutil.copyfileobj(source, destination, DOWNLOAD_CHUNK_SIZE)
+            extracted[name] = target
+
+    return ShapefilePaths(
+        shp=extracted[shp_name],
+        dbf=extracted[dbf_name],
+        shx=extracted[shx_name],
         encoding=encoding,
     )
 
 
-def _convert_shapefile_to_geojson(reader: shapefile.Reader) -> dict[str, Any]:
-    fields = [field[0] for field in reader.fields[1:]]
-    features: list[dict[str, Any]] = []
+def _open_shapefile(paths: ShapefilePaths) -> shapefile.Reader:
+    # Os três arquivos são extraídos com o mesmo nome base; o Reader os abre
+    # sob demanda a partir dele e os fecha em `close()`.
+    return shapefile.Reader(str(paths.shp.with_suffix("")), encoding=paths.encoding)
+
 
-    for shape_record in reader.iterShapeRecords():
-        properties = {
-            fields[index]: shape_record.record[index]
-            for index in range(len(fields))
-        }
-        geometry = shape_record.shape.__geo_interface__
-        feature: dict[str, Any] = {
-            "type": "Feature",
-            "geometry": geometry,
-            "properties": properties,
-        }
-        code = _extract_municipality_code(properties)
-        if code:
-            feature["id"] = code
-        features.append(feature)
+def _build_feature(fields: list[str], record: Iterable[Any], geometry: dict[str, Any]) -> dict[str, Any]:
+    properties = dict(zip(fields, record))
+    feature: dict[str, Any] = {
+        "type": "Feature",
+        "geometry": geometry,
+        "properties": properties,
+    }
+    code = _extract_municipality_code(properties)
+    if code:
+        feature["id"] = code
+    return feature
+
+
+def _feature_outputs(feature: dict[str, Any]) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Versões de uma feição para cada arquivo de saída.
+
+    Cada nível (completo e simplificados) vai para o arquivo nacional e para o
+    shard da UF, identificado pelo prefixo de 2 dígitos do código IBGE.
+    """
+    prefix = feature.get("id", "")[:2]
+    variants = [(None, feature)]
+    for level, tolerance in GEOMETRY_LEVELS.items():
+        variants.append(
+            (level, {**feature, "geometry": simplify_geometry(feature["geometry"], tolerance)})
+        )
+    for level, variant in variants:
+        yield geometry_filename(level), variant
+        if prefix in IBGE_PREFIX_TO_UF:
+            yield shard_filename(prefix, level), variant
+
+
+def _geometry_bbox(geometry: dict[str, Any]) -> tuple[float, float, float, float] | None:
+    coordinates = geometry.get("coordinates")
+    if geometry.get("type") == "Polygon":
+        rings = coordinates
+    elif geometry.get("type") == "MultiPolygon":
+        rings = [ring for polygon in coordinates for ring in polygon]
+    else:
+        return None
+    points = np.concatenate([np.asarray(ring, dtype=float) for ring in rings if len(ring)])
+    min_x, min_y = points.min(axis=0)
+    max_x, max_y = points.max(axis=0)
+    return float(min_x), float(min_y), float(max_x), float(max_y)
+
+
+def _merge_bbox(current: list[float] | None, bbox: Iterable[float]) -> list[float]:
+    min_x, min_y, max_x, max_y = bbox
+    if current is None:
+        return [min_x, min_y, max_x, max_y]
+    return [
+        min(current[0], min_x),
+        min(current[1], min_y),
+        max(current[2], max_x),
+        max(current[3], max_y),
+    ]
+
+
+def _convert_record_range(
+    paths: ShapefilePaths, start: int, stop: int, part_dir: Path
+) -> tuple[dict[str, Path], dict[str, dict[str, Any]]]:
+    """Converte os registros `[start, stop)` em arquivos parciais, uma feição por linha.
+
+    Devolve também, por prefixo de UF, a contagem de feições e o bounding box.
+    """
+    reader = _open_shapefile(paths)
+    part_files: dict[str, Any] = {}
+    part_paths: dict[str, Path] = {}
+    shard_stats: dict[str, dict[str, Any]] = {}
+    try:
+        fields = [field[0] for field in reader.fields[1:]]
+        for index in range(start, stop):
+            feature = _build_feature(
+                fields, reader.record(index), reader.shape(index).__geo_interface__
+            )
+            prefix = feature.get("id", "")[:2]
+            bbox = _geometry_bbox(feature["geometry"])
+            if prefix in IBGE_PREFIX_TO_UF and bbox is not None:
+                stats = shard_stats.setdefault(prefix, {"features": 0, "bbox": None})
+                stats["features"] += 1
+                stats["bbox"] = _merge_bbox(stats["bbox"], bbox)
+            for output_name, output_feature in _feature_outputs(feature):
+                if output_name not in part_files:
+                    part_paths[output_name] = part_dir / f"{output_name}.{start:08d}.part"
+                    part_paths[output_name].parent.mkdir(parents=True, exist_ok=True)
+                    part_files[output_name] = part_paths[output_name].open("w", encoding="utf-8")
+                part_files[output_name].write(json.dumps(output_feature))
+                part_files[output_name].write("\n")
+    finally:
+        for part_file in part_files.values():
+            part_file.close()
+        reader.close()
+    return part_paths, shard_stats
+
+
+def _merge_parts(output_path: Path, part_paths: list[Path]) -> None:
+    """Junta os arquivos parciais em um FeatureCollection sem carregá-los em memória."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(".geojson.tmp")
+    first = True
+    with tmp_path.open("w", encoding="utf-8") as output:
+        output.write('{"type": "FeatureCollection", "features": [')
+        for part_path in part_paths:
+            with part_path.open("r", encoding="utf-8") as part:
+                for line in part:
+                    if not first:
+                        output.write(", ")
+                    output.write(line.rstrip("\n"))
+                    first = False
+        output.write("]}")
+    os.replace(tmp_path, output_path)
+
+
+def _write_shard_index(data_dir: Path, partial_stats: list[dict[str, dict[str, Any]]]) -> Path:
+    shards: dict[str, dict[str, Any]] = {}
+    for stats in partial_stats:
+        for prefix, shard in stats.items():
+            merged = shards.setdefault(
+                prefix, {"uf": IBGE_PREFIX_TO_UF[prefix], "features": 0, "bbox": None}
+            )
+            merged["features"] += shard["features"]
+            merged["bbox"] = _merge_bbox(merged["bbox"], shard["bbox"])
+
+    index_path = data_dir / SHARD_INDEX_FILENAME
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with index_path.open("w", encoding="utf-8") as index_file:
+        json.dump({"levels": list(GEOMETRY_LEVELS), "shards": dict(sorted(shards.items()))}, index_file)
+    return index_path
+
+
+def convert_shapefile_zip(zip_path: Path, data_dir: Path, workers: int = 1) -> Path:
+    """Converte o ZIP do IBGE nos GeoJSON do app com memória limitada.
+
+    Os registros são divididos em faixas contínuas; cada faixa é convertida
+    (em paralelo quando `workers > 1`) para arquivos parciais em disco, que
+    depois são concatenados na ordem original.
+    """
+    work_dir = Path(tempfile.mkdtemp(prefix="municipalities-", dir=data_dir))
+    try:
+        paths = _extract_shapefile(zip_path, work_dir / "shapefile")
+        reader = _open_shapefile(paths)
+        total = len(reader)
+        reader.close()
+
+        workers = max(1, workers)
+        chunk_size = max(1, -(-total // (workers * 4)))
+        ranges = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+        part_dir = work_dir / "parts"
+
+        if workers == 1:
+            results = [_convert_record_range(paths, start, stop, part_dir) for start, stop in ranges]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(
+                        _convert_record_range,
+                        [paths] * len(ranges),
+                        [start for start, _ in ranges],
+                        [stop for _, stop in ranges],
+                        [part_dir] * len(ranges),
+                    )
+                )
+
+        output_names = dict.fromkeys(
+            output_name for part_paths, _ in results for output_name in part_paths
+        )
+        for output_name in output_names:
+            _merge_parts(
+                data_dir / output_name,
+                [part_paths[output_name] for part_paths, _ in results if output_name in part_paths],
+            )
+        _write_shard_index(data_dir, [shard_stats for _, shard_stats in results])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
 
-    return {"type": "FeatureCollection", "features": features}
+    return data_dir / GEOJSON_FILENAME
 
 
-def download_municipality_geojson(data_dir: Path, force: bool = False) -> Path:
+def download_municipality_geojson(data_dir: Path, force: bool = False, workers: int = 1) -> Path:
     """Baixa a malha municipal (ZIP) e converte o shapefile para GeoJSON.
 
-    O fluxo salva o ZIP em disco, extrai os bytes do SHP/DBF/SHX, carrega com
-    pyshp e monta um FeatureCollection já com o código IBGE como `id`.
+    O ZIP é baixado em blocos para o disco, o SHP/DBF/SHX é extraído e lido
+    registro a registro com pyshp, e cada feição (já com o código IBGE como
+    `id`) é gravada assim que lida. Além da malha completa, grava as variantes
+    simplificadas de `GEOMETRY_LEVELS` e os shards por UF com seu índice.
     """
     data_dir.mkdir(parents=True, exist_ok=True)
     geojson_path = data_dir / GEOJSON_FILENAME
+    outputs = [
+        geojson_path,
+        data_dir / SHARD_INDEX_FILENAME,
+        *(data_dir / geometry_filename(level) for level in GEOMETRY_LEVELS),
+    ]
 
-    if geojson_path.exists() and not force:
+    if not force and all(path.exists() for path in outputs):
         return geojson_path
 
     zip_path = data_dir / "municipalities.zip"
-    response = requests.get(IBGE_MUNICIPALITIES_ZIP_URL, timeout=120)
-    response.raise_for_status()
-    zip_path.write_bytes(response.content)
-
-    reader = _load_shapefile_from_zip(zip_path)
-    geojson = _convert_shapefile_to_geojson(reader)
-
-    with geojson_path.open("w", encoding="utf-8") as geojson_file:
-        json.dump(geojson, geojson_file)
+    if force or not zip_path.exists():
+        _download_zip(IBGE_MUNICIPALITIES_ZIP_URL, zip_path)
 
-    return geojson_path
+    return convert_shapefile_zip(zip_path, data_dir, workers=workers)
 
 
-def load_municipality_geojson(data_dir: Path, force: bool = False) -> dict[str, Any]:
-    geojson_path = data_dir / GEOJSON_FILENAME
-    if not geojson_path.exists():
+def load_municipality_index(data_dir: Path) -> dict[str, Any]:
+    """Índice dos shards por UF: níveis disponíveis, contagem e bounding box."""
+    index_path = data_dir / SHARD_INDEX_FILENAME
+    if not index_path.exists():
         raise FileNotFoundError(
-            "Arquivo municipalities.geojson não encontrado. "
+            "Índice das malhas por UF não encontrado. "
             "Execute o script scripts/download_geojson.py antes de usar o app."
         )
+    with index_path.open("r", encoding="utf-8") as index_file:
+        return json.load(index_file)
+
+
+def bbox_view_state(bbox: Iterable[float]) -> tuple[float, float, float]:
+    """Centro (lat, lon) e zoom aproximado do pydeck que enquadram o bounding box."""
+    min_x, min_y, max_x, max_y = bbox
+    extent = max(max_x - min_x, (max_y - min_y) * 1.5, 1e-6)
+    zoom = float(np.clip(np.log2(360 / extent) + 0.5, 3.0, 12.0))
+    return (min_y + max_y) / 2, (min_x + max_x) / 2, zoom
+
+
+def load_municipality_geojson(
+    data_dir: Path,
+    force: bool = False,
+    level: str | None = None,
+    uf: str | None = None,
+) -> dict[str, Any]:
+    """Carrega a malha municipal; `level` escolhe uma variante simplificada.
+
+    Com `uf`, lê apenas o shard da UF, sem exigir a malha nacional. Se a
+    variante ou o shard pedido ainda não foi gerado, cai para a malha nacional
+    (filtrada pelo prefixo da UF).
+    """
+    geojson_path = data_dir / GEOJSON_FILENAME
     if force:
+        if not geojson_path.exists():
+            raise FileNotFoundError(MISSING_GEOJSON_MESSAGE)
         return download_municipality_geojson(data_dir, force=True)
+
+    prefix = UF_IBGE_PREFIXES.get(uf) if uf else None
+    if uf and prefix is None:
+        raise ValueError(f"UF desconhecida: {uf}")
+    shard_path = data_dir / shard_filename(prefix, level) if prefix else None
+    if shard_path is not None and shard_path.exists():
+        with shard_path.open("r", encoding="utf-8") as shard_file:
+            return json.load(shard_file)
+
+    if not geojson_path.exists():
+        raise FileNotFoundError(MISSING_GEOJSON_MESSAGE)
+    if level is not None and (data_dir / geometry_filename(level)).exists():
+        geojson_path = data_dir / geometry_filename(level)
     with geojson_path.open("r", encoding="utf-8") as geojson_file:
-        return json.load(geojson_file)
+        geojson = json.load(geojson_file)
+    if prefix:
+        geojson["features"] = [
+            feature
+            for feature in geojson.get("features", [])
+            if str(feature.get("id", "")).startswith(prefix)
+        ]
+    return geojson
@@ -0,0 +1,169 @@
+"""Índices de filtro construídos uma vez por snapshot do dataset.
+
+Cada coluna filtrável é codificada como inteiros (`codes`) sobre a lista de
+valores distintos. Colunas de baixa cardinalidade guardam ainda um bitmap
+compactado por valor, de modo que um filtro vira OR de bitmaps dentro da
+coluna e AND entre colunas, com um único `take` no final. Em colunas de alta
+cardinalidade (CNAE) um bitmap por valor custaria linhas x valores; nelas o OR
+é feito por uma tabela de consulta sobre os códigos, com o mesmo resultado.
+`mes_ref` vira chaves inteiras de mês ordenadas, e um intervalo é uma fatia
+obtida por `searchsorted`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.repositories.month_keys import month_keys
+
+if TYPE_CHECKING:
+    from src.services.prospect_service import ProspectFilters
+
+BITMAP_MAX_CARDINALITY = 64
+
+
+@dataclass
+class ColumnIndex:
+    values: pd.Index
+    codes: np.ndarray
+    bitmaps: np.ndarray | None = None
+
+    @classmethod
+    def build(cls, series: pd.Series) -> ColumnIndex:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            values = pd.Index(series.cat.categories)
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            values = pd.Index(uniques)
+        codes = codes.astype(np.int32, copy=False)
+
+        bitmaps = None
+        if len(values) <= BITMAP_MAX_CARDINALITY:
+            bitmaps = np.empty((len(values), (len(codes) + 7) // 8), dtype=np.uint8)
+            for code in range(len(values)):
+                bitmaps[code] = np.packbits(codes == code)
+        return cls(values=values, codes=codes, bitmaps=bitmaps)
+
+    def value_codes(self, selected: Sequence[Any]) -> np.ndarray:
+        positions = self.values.get_indexer(pd.Index(list(selected)))
+        return np.unique(positions[positions >= 0])
+
+    def bitmap(self, selected: Sequence[Any]) -> np.ndarray:
+        """Bitmap compactado (np.packbits) das linhas com qualquer um dos valores."""
+        codes = self.value_codes(selected)
+        if self.bitmaps is not None:
+            if len(codes) == 0:
+                return np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+            return np.bitwise_or.reduce(self.bitmaps[codes], axis=0)
+
+        # O slot extra no fim absorve o código -1 (valor ausente).
+        lookup = np.zeros(len(self.values) + 1, dtype=bool)
+        lookup[codes] = True
+        return np.packbits(lookup[self.codes])
+
+
+@dataclass
+class ProspectIndex:
+    size: int
+    columns: dict[str, ColumnIndex]
+    mes_ref_sorted: np.ndarray | None
+    mes_ref_order: np.ndarray | None
+
+    def _column_bitmaps(self, filters: ProspectFilters) -> dict[str, np.ndarray]:
+        bitmaps: dict[str, np.ndarray] = {}
+        for column, column_index in self.columns.items():
+            values = getattr(filters, column, None)
+            if values:
+                bitmaps[column] = column_index.bitmap(values)
+        return bitmaps
+
+    def _range_mask(self, filters: ProspectFilters) -> np.ndarray | None:
+        """Linhas no intervalo de meses, via `searchsorted` sobre as chaves ordenadas."""
+        if self.mes_ref_sorted is None or not (filters.mes_ref_start or filters.mes_ref_end):
+            return None
+        start, end = filters.mes_ref_range
+        # Chaves inválidas (-1) ficam no início e nunca entram no intervalo.
+        low = np.searchsorted(self.mes_ref_sorted, max(start or 0, 0), side="left")
+        high = (
+            len(self.mes_ref_sorted)
+            if end is None
+            else np.searchsorted(self.mes_ref_sorted, end, side="right")
+        )
+        range_mask = np.zeros(self.size, dtype=bool)
+        range_mask[self.mes_ref_order[low:high]] = True
+        return range_mask
+
+    def _combine(
+        self, bitmaps: Sequence[np.ndarray], range_mask: np.ndarray | None
+    ) -> np.ndarray | None:
+        combined: np.ndarray | None = None
+        for bitmap in bitmaps:
+            combined = bitmap if combined is None else combined & bitmap
+        mask = None if combined is None else np.unpackbits(combined, count=self.size).view(bool)
+        if range_mask is not None:
+            mask = range_mask if mask is None else mask & range_mask
+        return mask
+
+    def mask(self, filters: ProspectFilters) -> np.ndarray | None:
+        """Máscara booleana das linhas aceitas, ou None quando nada filtra."""
+        return self._combine(
+            list(self._column_bitmaps(filters).values()), self._range_mask(filters)
+        )
+
+    def facet_counts(
+        self, filters: ProspectFilters, row_mask: np.ndarray | None = None
+    ) -> dict[str, pd.Series]:
+        """Prospects por opção de cada coluna, aplicando todos os filtros exceto o dela.
+
+        As colunas sem filtro ativo compartilham a máscara completa; as demais
+        usam o AND dos bitmaps das outras colunas. A contagem é um `bincount`
+        sobre os códigos da coluna. `row_mask` restringe todas as contagens
+        (filtros que não são colunas, como a carteira).
+        """
+        bitmaps = self._column_bitmaps(filters)
+        range_mask = self._range_mask(filters)
+        if row_mask is not None:
+            range_mask = row_mask if range_mask is None else range_mask & row_mask
+        full_mask = self._combine(list(bitmaps.values()), range_mask)
+
+        counts: dict[str, pd.Series] = {}
+        for column, column_index in self.columns.items():
+            if column in bitmaps:
+                others = [bitmap for name, bitmap in bitmaps.items() if name != column]
+                mask = self._combine(others, range_mask)
+            else:
+                mask = full_mask
+            codes = column_index.codes if mask is None else column_index.codes[mask]
+            counts[column] = pd.Series(
+                np.bincount(codes[codes >= 0], minlength=len(column_index.values)),
+                index=column_index.values,
+            )
+        return counts
+
+    def positions(self, filters: ProspectFilters) -> np.ndarray | None:
+        mask = self.mask(filters)
+        if mask is None:
+            return None
+        return np.flatnonzero(mask)
+
+
+def build_prospect_index(df: pd.DataFrame, columns: Sequence[str]) -> ProspectIndex:
+    mes_ref_sorted = None
+    mes_ref_order = None
+    if "mes_ref" in df.columns:
+        keys = month_keys(df["mes_ref"])
+        mes_ref_order = np.argsort(keys, kind="stable").astype(np.int64)
+        mes_ref_sorted = keys[mes_ref_order]
+    return ProspectIndex(
+        size=len(df),
+        columns={
+            column: ColumnIndex.build(df[column]) for column in columns if column in df.columns
+        },
+        mes_ref_sorted=mes_ref_sorted,
+        mes_ref_order=mes_ref_order,
+    )
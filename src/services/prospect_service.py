@@ -1,16 +1,26 @@
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable, Iterator, Sequence
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import select
+from sqlalchemy import Select, insert, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
 
 from src.models.assignment import DistributionLog, ProspectAssignment
 from src.models.db import get_session
+from src.models.filter_set import FilterSet, canonical_filters_json, filters_hash
+from src.repositories.cached_repository import CachedProspectsRepository, ProspectSnapshot
+from src.repositories.month_keys import month_range_mask, month_start, parse_month
 from src.repositories.prospects_repository import ProspectsRepository
+from src.services.assignment_index import RowOwners, assignment_index, assignment_mask
+from src.services.filter_cache import filter_results_cache
+from src.services.filter_catalog_service import FilterCatalog, get_filter_catalog
+from src.services.prospect_index import ProspectIndex, build_prospect_index
 
 
 @dataclass
@@ -32,6 +42,63 @@ class ProspectFilters:
     funil: list[str] | None = None
     mes_ref_start: str | None = None
     mes_ref_end: str | None = None
+    # Filtros de carteira: anti-join com as atribuições atuais, não com colunas.
+    only_unassigned: bool = False
+    exclude_executivo_ids: list[int] | None = None
+    # Prospects específicos, para leituras diretas da fonte (ex.: um bloco da exportação).
+    cnpj_cpf: list[str] | None = None
+
+    def __post_init__(self) -> None:
+        """Valida o intervalo de `mes_ref` e normaliza os limites para `YYYY-MM-01`."""
+        start, end = self.mes_ref_range
+        if start is not None and end is not None and start > end:
+            raise ValueError("Mês de referência inicial posterior ao final.")
+        self.mes_ref_start = None if start is None else month_start(start)
+        self.mes_ref_end = None if end is None else month_start(end)
+
+    @property
+    def mes_ref_range(self) -> tuple[int | None, int | None]:
+        """Chaves de mês (inclusivas) do intervalo de `mes_ref`."""
+        return (
+            parse_month(self.mes_ref_start) if self.mes_ref_start else None,
+            parse_month(self.mes_ref_end) if self.mes_ref_end else None,
+        )
+
+    @property
+    def uses_assignments(self) -> bool:
+        return bool(self.only_unassigned or self.exclude_executivo_ids)
+
+    def without_assignments(self) -> ProspectFilters:
+        return replace(self, only_unassigned=False, exclude_executivo_ids=None)
+
+
+MULTI_FILTER_COLUMNS = (
+    "cd_cnae5",
+    "cd_cnae",
+    "faixa_fat",
+    "unidade_federal",
+    "poligono",
+    "pub_credito",
+    "porte",
+    "rating",
+    "fl_potencial",
+    "fl_cnae_foco",
+    "fl_pep",
+    "status_cadastral",
+    "segmento",
+    "campanha",
+    "funil",
+)
+
+
+DEFAULT_PAGE_SIZE = 500
+# Linhas por bloco ao percorrer a carteira ou os logs inteiros (exportação).
+DEFAULT_RECORD_CHUNK_SIZE = 50_000
+
+# Abaixo do limite histórico de 999 variáveis por statement do SQLite.
+ASSIGNMENT_LOOKUP_CHUNK_SIZE = 900
+# Prospects gravados por transação em `assign_prospects`.
+ASSIGNMENT_COMMIT_CHUNK_SIZE = 5_000
 
 
 @dataclass
@@ -42,108 +109,518 @@ class AssignmentResult:
     overwritten: int
 
 
+@dataclass(frozen=True)
+class PageCursor:
+    assigned_at: datetime
+    id: int
+
+
+@dataclass
+class RecordPage:
+    frame: pd.DataFrame
+    next_cursor: PageCursor | None
+
+
+def _active_filter_columns(filters: ProspectFilters) -> list[str]:
+    active = [column for column in MULTI_FILTER_COLUMNS if getattr(filters, column)]
+    if filters.mes_ref_start or filters.mes_ref_end:
+        active.append("mes_ref")
+    if filters.uses_assignments:
+        active.append("cnpj_cpf")
+    return active
+
+
 def _apply_multi_filter(df: pd.DataFrame, column: str, values: list[Any] | None) -> pd.DataFrame:
     if not values:
         return df
     return df[df[column].isin(values)]
 
 
-def filter_prospects(repo: ProspectsRepository, filters: ProspectFilters) -> pd.DataFrame:
-    df = repo.load()
-    df = _apply_multi_filter(df, "cd_cnae5", filters.cd_cnae5)
-    df = _apply_multi_filter(df, "cd_cnae", filters.cd_cnae)
-    df = _apply_multi_filter(df, "faixa_fat", filters.faixa_fat)
-    df = _apply_multi_filter(df, "unidade_federal", filters.unidade_federal)
-    df = _apply_multi_filter(df, "poligono", filters.poligono)
-    df = _apply_multi_filter(df, "pub_credito", filters.pub_credito)
-    df = _apply_multi_filter(df, "porte", filters.porte)
-    df = _apply_multi_filter(df, "rating", filters.rating)
-    df = _apply_multi_filter(df, "fl_potencial", filters.fl_potencial)
-    df = _apply_multi_filter(df, "fl_cnae_foco", filters.fl_cnae_foco)
-    df = _apply_multi_filter(df, "fl_pep", filters.fl_pep)
-    df = _apply_multi_filter(df, "status_cadastral", filters.status_cadastral)
-    df = _apply_multi_filter(df, "segmento", filters.segmento)
-    df = _apply_multi_filter(df, "campanha", filters.campanha)
-    df = _apply_multi_filter(df, "funil", filters.funil)
-
-    if filters.mes_ref_start:
-        df = df[df["mes_ref"] >= filters.mes_ref_start]
-    if filters.mes_ref_end:
-        df = df[df["mes_ref"] <= filters.mes_ref_end]
+def filter_prospects(
+    repo: ProspectsRepository,
+    filters: ProspectFilters,
+    columns: Sequence[str] | None = None,
+) -> pd.DataFrame:
+    """Filtra os prospects empurrando filtros e projeção de colunas ao repositório.
+
+    Com o repositório em cache, o filtro usa o índice do snapshot (ou o cache
+    de resultados) e faz um único `take`. Nos demais, o repositório pode
+    descartar row groups e colunas na leitura e os filtros são reaplicados aqui.
+    """
+    if isinstance(repo, CachedProspectsRepository):
+        return _filter_with_index(repo, filters, columns)
+
+    load_columns = None
+    if columns is not None:
+        load_columns = list(dict.fromkeys([*columns, *_active_filter_columns(filters)]))
+
+    df = repo.load(filters=filters, columns=load_columns)
+    for column in MULTI_FILTER_COLUMNS:
+        df = _apply_multi_filter(df, column, getattr(filters, column))
+
+    if filters.mes_ref_start or filters.mes_ref_end:
+        df = df[month_range_mask(df["mes_ref"], *filters.mes_ref_range)]
+
+    if filters.uses_assignments:
+        owners = RowOwners.build(df["cnpj_cpf"]).owners(assignment_index())
+        df = df[assignment_mask(owners, filters)]
+
+    if columns is not None:
+        df = df[list(columns)]
     return df
 
 
+def facet_counts(repo: ProspectsRepository, filters: ProspectFilters) -> dict[str, pd.Series]:
+    """Prospects por opção de cada filtro, considerando os demais filtros ativos.
+
+    Com o repositório em cache, as contagens saem do índice do snapshot em uma
+    passada por coluna; nos demais, cada coluna é filtrada sem o próprio filtro.
+    """
+    if isinstance(repo, CachedProspectsRepository):
+        snapshot = repo.snapshot()
+        return get_prospect_index(snapshot).facet_counts(
+            filters, row_mask=_snapshot_assignment_mask(snapshot, filters)
+        )
+
+    range_only = replace(filters, **{column: None for column in MULTI_FILTER_COLUMNS})
+    df = filter_prospects(repo, range_only)
+    counts: dict[str, pd.Series] = {}
+    for column in MULTI_FILTER_COLUMNS:
+        if column not in df.columns:
+            continue
+        subset = df
+        for other in MULTI_FILTER_COLUMNS:
+            if other != column:
+                subset = _apply_multi_filter(subset, other, getattr(filters, other))
+        counts[column] = subset[column].value_counts(sort=False)
+    return counts
+
+
+def get_prospect_index(snapshot: ProspectSnapshot) -> ProspectIndex:
+    return snapshot.derive(
+        "filter_index", lambda frame: build_prospect_index(frame, MULTI_FILTER_COLUMNS)
+    )
+
+
+def _snapshot_assignment_mask(
+    snapshot: ProspectSnapshot, filters: ProspectFilters
+) -> np.ndarray | None:
+    if not filters.uses_assignments:
+        return None
+    return assignment_mask(_snapshot_row_owners(snapshot).owners(assignment_index()), filters)
+
+
+def _snapshot_row_owners(snapshot: ProspectSnapshot) -> RowOwners:
+    return snapshot.derive("row_owners", lambda frame: RowOwners.build(frame["cnpj_cpf"]))
+
+
+def _snapshot_positions(snapshot: ProspectSnapshot, index: pd.Index) -> np.ndarray | None:
+    """Posições no snapshot das linhas de `index`, ou None se não vierem dele."""
+    frame_index = snapshot.frame.index
+    if not frame_index.is_unique:
+        return None
+    positions = frame_index.get_indexer(index)
+    return None if (positions < 0).any() else positions
+
+
+def current_owners(repo: ProspectsRepository, prospects: pd.DataFrame) -> pd.Series:
+    """Executivo atual de cada prospect (nulo se ainda não atribuído), sem ir ao banco.
+
+    Para linhas de `filter_prospects` sobre o repositório em cache, usa os donos
+    alinhados ao snapshot, atualizados só com as atribuições feitas desde a
+    última consulta.
+    """
+    positions = None
+    if isinstance(repo, CachedProspectsRepository):
+        snapshot = repo.snapshot()
+        positions = _snapshot_positions(snapshot, prospects.index)
+    if positions is not None:
+        owners = _snapshot_row_owners(snapshot).owners(assignment_index(), positions)
+    else:
+        owners = RowOwners.build(prospects["cnpj_cpf"]).owners(assignment_index())
+    return pd.Series(owners, index=prospects.index).where(owners >= 0).astype("Int64")
+
+
+def get_prospect_catalog(snapshot: ProspectSnapshot, path: Path | None = None) -> FilterCatalog:
+    """Catálogo de opções dos filtros do snapshot, persistido em `path` quando informado."""
+    return snapshot.derive(
+        "filter_catalog",
+        lambda frame: get_filter_catalog(frame, MULTI_FILTER_COLUMNS, snapshot.version, path),
+    )
+
+
+def filter_positions(
+    repo: CachedProspectsRepository,
+    filters: ProspectFilters,
+    snapshot: ProspectSnapshot | None = None,
+) -> np.ndarray | None:
+    """Posições no snapshot das linhas aceitas pelos filtros, ou None se nada filtra.
+
+    O resultado dos filtros de coluna fica no cache LRU de `filter_cache`,
+    chaveado pela fonte, pela versão do dataset e pelo hash canônico dos
+    filtros. Os filtros de carteira mudam a cada atribuição e são aplicados
+    depois, sobre as posições em cache.
+    """
+    if not _active_filter_columns(filters):
+        return None
+    snapshot = snapshot or repo.snapshot()
+    positions = _column_filter_positions(repo, filters.without_assignments(), snapshot)
+
+    keep = _snapshot_assignment_mask(snapshot, filters)
+    if keep is None:
+        return positions
+    return np.flatnonzero(keep) if positions is None else positions[keep[positions]]
+
+
+def _column_filter_positions(
+    repo: CachedProspectsRepository, filters: ProspectFilters, snapshot: ProspectSnapshot
+) -> np.ndarray | None:
+    if not _active_filter_columns(filters):
+        return None
+    canonical_json = canonical_filters_json(filters.__dict__)
+    key = (repo.source.cache_key(), snapshot.version, filters_hash(canonical_json))
+    cache = filter_results_cache()
+    positions = cache.get(key)
+    if positions is not None:
+        return positions
+
+    positions = get_prospect_index(snapshot).positions(filters)
+    return None if positions is None else cache.put(key, positions)
+
+
+def _filter_with_index(
+    repo: CachedProspectsRepository,
+    filters: ProspectFilters,
+    columns: Sequence[str] | None,
+) -> pd.DataFrame:
+    snapshot = repo.snapshot()
+    df = snapshot.frame if columns is None else snapshot.frame[list(columns)]
+    positions = filter_positions(repo, filters, snapshot)
+    if positions is None:
+        return df.copy(deep=False)
+    return df.take(positions)
+
+
+def _fetch_current_owners(session: Session, prospect_ids: Sequence[str]) -> dict[str, int]:
+    owners: dict[str, int] = {}
+    for start in range(0, len(prospect_ids), ASSIGNMENT_LOOKUP_CHUNK_SIZE):
+        chunk = prospect_ids[start : start + ASSIGNMENT_LOOKUP_CHUNK_SIZE]
+        rows = session.execute(
+            select(ProspectAssignment.cnpj_cpf, ProspectAssignment.executivo_id).where(
+                ProspectAssignment.cnpj_cpf.in_(chunk)
+            )
+        )
+        owners.update(rows.tuples().all())
+    return owners
+
+
+def get_or_create_filter_set(session: Session, filters: ProspectFilters) -> int:
+    """Id do `filter_sets` equivalente aos filtros, criando o registro se preciso."""
+    canonical_json = canonical_filters_json(filters.__dict__)
+    digest = filters_hash(canonical_json)
+    session.execute(
+        sqlite_insert(FilterSet)
+        .values(filters_hash=digest, filters_json=canonical_json, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=[FilterSet.filters_hash])
+    )
+    return session.execute(
+        select(FilterSet.id).where(FilterSet.filters_hash == digest)
+    ).scalar_one()
+
+
+def _assign_chunk(
+    session: Session,
+    prospect_ids: Sequence[str],
+    executive_ids: Sequence[int],
+    filter_set_id: int,
+    mes_ref: str | None,
+    assigned_at: datetime,
+) -> tuple[int, int]:
+    """Grava um bloco de ids únicos (cada um com seu executivo); devolve (novos, reatribuídos)."""
+    owners = _fetch_current_owners(session, prospect_ids)
+    to_assign = [
+        (prospect_id, executivo_id)
+        for prospect_id, executivo_id in zip(prospect_ids, executive_ids)
+        if owners.get(prospect_id) != executivo_id
+    ]
+    if not to_assign:
+        return 0, 0
+
+    upsert = sqlite_insert(ProspectAssignment)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[ProspectAssignment.cnpj_cpf],
+        set_={
+            "executivo_id": upsert.excluded.executivo_id,
+            "assigned_at": upsert.excluded.assigned_at,
+            "filter_set_id": upsert.excluded.filter_set_id,
+            "mes_ref": upsert.excluded.mes_ref,
+        },
+    )
+    session.execute(
+        upsert,
+        [
+            {
+                "cnpj_cpf": prospect_id,
+                "executivo_id": executivo_id,
+                "assigned_at": assigned_at,
+                "filter_set_id": filter_set_id,
+                "mes_ref": mes_ref,
+            }
+            for prospect_id, executivo_id in to_assign
+        ],
+    )
+    session.execute(
+        insert(DistributionLog),
+        [
+            {
+                "cnpj_cpf": prospect_id,
+                "executivo_id": executivo_id,
+                "previous_executivo_id": owners.get(prospect_id),
+                "assigned_at": assigned_at,
+                "filter_set_id": filter_set_id,
+                "mes_ref": mes_ref,
+            }
+            for prospect_id, executivo_id in to_assign
+        ],
+    )
+    overwritten = sum(1 for prospect_id, _ in to_assign if prospect_id in owners)
+    return len(to_assign) - overwritten, overwritten
+
+
 def assign_prospects(
-    executivo_id: int, prospect_ids: list[str], filters: ProspectFilters
+    executivo_id: int,
+    prospect_ids: list[str],
+    filters: ProspectFilters,
+    chunk_size: int = ASSIGNMENT_COMMIT_CHUNK_SIZE,
+    on_progress: Callable[[int, AssignmentResult], None] | None = None,
 ) -> AssignmentResult:
-    assigned = 0
-    skipped_same_exec = 0
-    overwritten = 0
-    filters_json = json.dumps(filters.__dict__, ensure_ascii=False)
+    """Atribui os prospects ao executivo em blocos de `chunk_size`.
+
+    Cada bloco consulta os responsáveis atuais em lotes de `IN`, grava um
+    upsert e um insert em lote em `distribution_logs` e faz commit, liberando
+    o lock de escrita do SQLite entre blocos. `on_progress` recebe os ids
+    processados e o resultado parcial após cada commit. Ids repetidos contam
+    como ignorados.
+    """
     mes_ref = filters.mes_ref_start or filters.mes_ref_end
+    unique_ids = list(dict.fromkeys(prospect_ids))
+    assigned_at = datetime.utcnow()
+    assigned = overwritten = 0
 
     with next(get_session()) as session:
-        for prospect_id in prospect_ids:
-            existing = session.execute(
-                select(ProspectAssignment).where(ProspectAssignment.cnpj_cpf == prospect_id)
-            ).scalar_one_or_none()
-
-            if existing and existing.executivo_id == executivo_id:
-                skipped_same_exec += 1
-                continue
-
-            previous_exec = existing.executivo_id if existing else None
-            if existing:
-                existing.executivo_id = executivo_id
-                existing.assigned_at = datetime.utcnow()
-                existing.filters_json = filters_json
-                existing.mes_ref = mes_ref
-                overwritten += 1
-            else:
-                session.add(
-                    ProspectAssignment(
-                        cnpj_cpf=prospect_id,
-                        executivo_id=executivo_id,
-                        filters_json=filters_json,
-                        mes_ref=mes_ref,
-                    )
-                )
-                assigned += 1
-
-            session.add(
-                DistributionLog(
-                    cnpj_cpf=prospect_id,
-                    executivo_id=executivo_id,
-                    previous_executivo_id=previous_exec,
-                    filters_json=filters_json,
-                    mes_ref=mes_ref,
-                )
+        filter_set_id = get_or_create_filter_set(session, filters)
+        session.commit()
+
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start : start + chunk_size]
+            chunk_assigned, chunk_overwritten = _assign_chunk(
+                session,
+                chunk,
+                [executivo_id] * len(chunk),
+                filter_set_id,
+                mes_ref,
+                assigned_at,
             )
+            session.commit()
+            assignment_index().record(chunk, [executivo_id] * len(chunk))
+            assigned += chunk_assigned
+            overwritten += chunk_overwritten
+            if on_progress is not None:
+                processed = start + len(chunk)
+                on_progress(
+                    processed,
+                    AssignmentResult(
+                        total=processed,
+                        assigned=assigned,
+                        skipped_same_exec=processed - assigned - overwritten,
+                        overwritten=overwritten,
+                    ),
+                )
+
+    total = len(prospect_ids)
+    return AssignmentResult(
+        total=total,
+        assigned=assigned,
+        skipped_same_exec=total - assigned - overwritten,
+        overwritten=overwritten,
+    )
+
+
+def assign_allocation(
+    prospect_ids: Sequence[str],
+    executive_ids: Sequence[int],
+    filters: ProspectFilters,
+) -> AssignmentResult:
+    """Grava uma distribuição (um executivo por prospect) em uma única transação.
 
+    Usa o mesmo upsert e o mesmo log em lote de `assign_prospects`; os ids
+    devem ser únicos.
+    """
+    mes_ref = filters.mes_ref_start or filters.mes_ref_end
+    assigned_at = datetime.utcnow()
+    assigned = overwritten = 0
+
+    with next(get_session()) as session:
+        filter_set_id = get_or_create_filter_set(session, filters)
+        for start in range(0, len(prospect_ids), ASSIGNMENT_COMMIT_CHUNK_SIZE):
+            end = start + ASSIGNMENT_COMMIT_CHUNK_SIZE
+            chunk_assigned, chunk_overwritten = _assign_chunk(
+                session,
+                prospect_ids[start:end],
+                executive_ids[start:end],
+                filter_set_id,
+                mes_ref,
+                assigned_at,
+            )
+            assigned += chunk_assigned
+            overwritten += chunk_overwritten
         session.commit()
+    assignment_index().record(prospect_ids, executive_ids)
 
     total = len(prospect_ids)
     return AssignmentResult(
         total=total,
         assigned=assigned,
-        skipped_same_exec=skipped_same_exec,
+        skipped_same_exec=total - assigned - overwritten,
         overwritten=overwritten,
     )
 
 
-def list_distribution_logs(executivo_id: int | None = None, limit: int | None = None) -> list[DistributionLog]:
+DISTRIBUTION_LOG_COLUMNS = (
+    DistributionLog.id,
+    DistributionLog.assigned_at,
+    DistributionLog.cnpj_cpf,
+    DistributionLog.executivo_id,
+    DistributionLog.previous_executivo_id,
+    DistributionLog.mes_ref,
+)
+ASSIGNMENT_COLUMNS = (
+    ProspectAssignment.id,
+    ProspectAssignment.assigned_at,
+    ProspectAssignment.cnpj_cpf,
+    ProspectAssignment.executivo_id,
+    ProspectAssignment.mes_ref,
+)
+
+
+def _records_statement(
+    model: type[ProspectAssignment] | type[DistributionLog],
+    columns: Sequence[Any],
+    executivo_id: int | None,
+    start: datetime | None,
+    end: datetime | None,
+) -> Select:
+    stmt = (
+        select(*columns, FilterSet.filters_json)
+        .select_from(model)
+        .outerjoin(FilterSet, model.filter_set_id == FilterSet.id)
+    )
+    if executivo_id:
+        stmt = stmt.where(model.executivo_id == executivo_id)
+    if start:
+        stmt = stmt.where(model.assigned_at >= start)
+    if end:
+        stmt = stmt.where(model.assigned_at < end)
+    return stmt.order_by(model.assigned_at.desc(), model.id.desc())
+
+
+def _page_statement(
+    model: type[ProspectAssignment] | type[DistributionLog],
+    columns: Sequence[Any],
+    executivo_id: int | None,
+    start: datetime | None,
+    end: datetime | None,
+    after: PageCursor | None,
+    limit: int,
+) -> Select:
+    stmt = _records_statement(model, columns, executivo_id, start, end)
+    if after:
+        stmt = stmt.where(tuple_(model.assigned_at, model.id) < tuple_(after.assigned_at, after.id))
+    # Busca uma linha a mais para saber se existe próxima página.
+    return stmt.limit(limit + 1)
+
+
+def _records_frame(rows: Sequence[Any], columns: list[str]) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records(rows, columns=columns)
+    frame["assigned_at"] = pd.to_datetime(frame["assigned_at"])
+    for column in ("executivo_id", "previous_executivo_id"):
+        if column in frame.columns:
+            frame[column] = frame[column].astype("Int64")
+    return frame
+
+
+def _fetch_page(stmt: Select, limit: int) -> RecordPage:
     with next(get_session()) as session:
-        stmt = select(DistributionLog).order_by(DistributionLog.assigned_at.desc())
-        if executivo_id:
-            stmt = stmt.where(DistributionLog.executivo_id == executivo_id)
-        if limit:
-            stmt = stmt.limit(limit)
-        return list(session.execute(stmt).scalars())
+        result = session.execute(stmt)
+        columns = list(result.keys())
+        rows = result.all()
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        next_cursor = PageCursor(assigned_at=last["assigned_at"], id=last["id"])
 
-def list_assignments(executivo_id: int | None = None) -> list[ProspectAssignment]:
+    return RecordPage(frame=_records_frame(rows, columns), next_cursor=next_cursor)
+
+
+def _iter_records(stmt: Select, chunk_size: int) -> Iterator[pd.DataFrame]:
     with next(get_session()) as session:
-        stmt = select(ProspectAssignment)
-        if executivo_id:
-            stmt = stmt.where(ProspectAssignment.executivo_id == executivo_id)
-        return list(session.execute(stmt).scalars())
+        result = session.execute(stmt, execution_options={"yield_per": chunk_size})
+        columns = list(result.keys())
+        for rows in result.partitions():
+            yield _records_frame(rows, columns)
+
+
+def list_distribution_logs(
+    executivo_id: int | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: PageCursor | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> RecordPage:
+    """Página de `distribution_logs` do mais recente para o mais antigo.
+
+    A paginação é por keyset em `(assigned_at, id)`: passe o `next_cursor` da
+    página anterior em `after`. `start`/`end` delimitam `[start, end)`.
+    """
+    stmt = _page_statement(
+        DistributionLog, DISTRIBUTION_LOG_COLUMNS, executivo_id, start, end, after, limit
+    )
+    return _fetch_page(stmt, limit)
+
+
+def list_assignments(
+    executivo_id: int | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: PageCursor | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> RecordPage:
+    """Página da carteira atual, com a mesma paginação de `list_distribution_logs`."""
+    stmt = _page_statement(
+        ProspectAssignment, ASSIGNMENT_COLUMNS, executivo_id, start, end, after, limit
+    )
+    return _fetch_page(stmt, limit)
+
+
+def iter_distribution_logs(
+    executivo_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    chunk_size: int = DEFAULT_RECORD_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Todos os `distribution_logs` do filtro em blocos de `chunk_size` (`yield_per`)."""
+    stmt = _records_statement(DistributionLog, DISTRIBUTION_LOG_COLUMNS, executivo_id, start, end)
+    return _iter_records(stmt, chunk_size)
+
+
+def iter_assignments(
+    executivo_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    chunk_size: int = DEFAULT_RECORD_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Toda a carteira atual do filtro em blocos de `chunk_size` (`yield_per`)."""
+    stmt = _records_statement(ProspectAssignment, ASSIGNMENT_COLUMNS, executivo_id, start, end)
+    return _iter_records(stmt, chunk_size)
@@ -0,0 +1,333 @@
+"""Junção espacial lat/long -> código IBGE do município.
+
+Os polígonos municipais são indexados em uma grade regular: cada célula
+aponta para os municípios cujo bounding box a intersecta. Os pontos são
+convertidos em pares (ponto, município candidato) pela grade, filtrados pelo
+bounding box e testados em lote, município a município, com ray casting
+vetorizado (regra par-ímpar, que trata furos e multipolígonos). O resultado é
+gravado em um parquet ao lado do dataset por `scripts/join_municipalities.py`;
+o app apenas lê esse arquivo.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.repositories.prospects_repository import LocalFileRepository
+from src.services.geojson_service import (
+    GEOJSON_FILENAME,
+    feature_municipality_code,
+    geometry_filename,
+    load_municipality_geojson,
+)
+
+GRID_CELL_DEGREES = 0.25
+JOIN_CHUNK_SIZE = 200_000
+# Limite de elementos da matriz pontos x arestas avaliada de uma vez.
+MAX_CROSSING_MATRIX = 4_000_000
+# Malha completa: as variantes simplificadas deslocam divisas e trocam o município de pontos.
+DEFAULT_JOIN_LEVEL: str | None = None
+SIDECAR_METADATA_KEY = b"aa_aquisicao.municipios"
+
+
+@dataclass
+class PolygonIndex:
+    codes: np.ndarray
+    bboxes: np.ndarray
+    edge_offsets: np.ndarray
+    edges: np.ndarray
+    origin: tuple[float, float]
+    shape: tuple[int, int]
+    cell_offsets: np.ndarray
+    cell_features: np.ndarray
+
+    def feature_edges(self, feature: int) -> np.ndarray:
+        return self.edges[self.edge_offsets[feature] : self.edge_offsets[feature + 1]]
+
+    def cells(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """Célula da grade de cada ponto, ou -1 fora da área coberta."""
+        col = np.floor((lon - self.origin[0]) / GRID_CELL_DEGREES).astype(np.int64)
+        row = np.floor((lat - self.origin[1]) / GRID_CELL_DEGREES).astype(np.int64)
+        inside = (col >= 0) & (col < self.shape[0]) & (row >= 0) & (row < self.shape[1])
+        inside &= np.isfinite(lon) & np.isfinite(lat)
+        return np.where(inside, row * self.shape[0] + col, -1)
+
+
+def _polygon_rings(geometry: dict[str, Any] | None) -> list[Any]:
+    if not geometry:
+        return []
+    if geometry.get("type") == "Polygon":
+        return list(geometry["coordinates"])
+    if geometry.get("type") == "MultiPolygon":
+        return [ring for polygon in geometry["coordinates"] for ring in polygon]
+    return []
+
+
+def build_polygon_index(geojson: dict[str, Any]) -> PolygonIndex:
+    codes: list[str] = []
+    bboxes: list[tuple[float, float, float, float]] = []
+    edge_blocks: list[np.ndarray] = []
+    edge_offsets = [0]
+
+    for feature in geojson.get("features", []):
+        code = feature_municipality_code(feature)
+        rings = [np.asarray(ring, dtype=float) for ring in _polygon_rings(feature.get("geometry"))]
+        rings = [ring for ring in rings if len(ring) >= 3]
+        if not code or not rings:
+            continue
+        edges = np.concatenate(
+            [np.hstack([ring, np.roll(ring, -1, axis=0)]) for ring in rings]
+        )
+        points = np.concatenate(rings)
+        codes.append(code)
+        bboxes.append((*points.min(axis=0), *points.max(axis=0)))
+        edge_blocks.append(edges)
+        edge_offsets.append(edge_offsets[-1] + len(edges))
+
+    bbox_array = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    if len(bbox_array):
+        origin = (float(bbox_array[:, 0].min()), float(bbox_array[:, 1].min()))
+        extent_x = bbox_array[:, 2].max() - origin[0]
+        extent_y = bbox_array[:, 3].max() - origin[1]
+    else:
+        origin, extent_x, extent_y = (0.0, 0.0), 0.0, 0.0
+    shape = (int(extent_x // GRID_CELL_DEGREES) + 1, int(extent_y // GRID_CELL_DEGREES) + 1)
+
+    cell_pairs: list[np.ndarray] = []
+    feature_pairs: list[np.ndarray] = []
+    for feature, (min_x, min_y, max_x, max_y) in enumerate(bbox_array):
+        cols = np.arange(
+            int((min_x - origin[0]) // GRID_CELL_DEGREES),
+            int((max_x - origin[0]) // GRID_CELL_DEGREES) + 1,
+        )
+        rows = np.arange(
+            int((min_y - origin[1]) // GRID_CELL_DEGREES),
+            int((max_y - origin[1]) // GRID_CELL_DEGREES) + 1,
+        )
+        cells = (rows[:, None] * shape[0] + cols[None, :]).ravel()
+        cell_pairs.append(cells)
+        feature_pairs.append(np.full(len(cells), feature, dtype=np.int64))
+
+    all_cells = np.concatenate(cell_pairs) if cell_pairs else np.empty(0, dtype=np.int64)
+    all_features = np.concatenate(feature_pairs) if feature_pairs else np.empty(0, dtype=np.int64)
+    order = np.argsort(all_cells, kind="stable")
+    cell_offsets = np.searchsorted(all_cells[order], np.arange(shape[0] * shape[1] + 1))
+
+    return PolygonIndex(
+        codes=np.asarray(codes, dtype=object),
+        bboxes=bbox_array,
+        edge_offsets=np.asarray(edge_offsets, dtype=np.int64),
+        edges=np.concatenate(edge_blocks) if edge_blocks else np.empty((0, 4)),
+        origin=origin,
+        shape=shape,
+        cell_offsets=cell_offsets,
+        cell_features=all_features[order],
+    )
+
+
+def _points_in_polygon(edges: np.ndarray, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    inside = np.zeros(len(lon), dtype=bool)
+    step = max(1, MAX_CROSSING_MATRIX // max(len(edges), 1))
+    x1, y1, x2, y2 = (edges[:, column][None, :] for column in range(4))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, len(lon), step):
+            px = lon[start : start + step, None]
+            py = lat[start : start + step, None]
+            straddles = (y1 > py) != (y2 > py)
+            x_cross = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+            crossings = np.count_nonzero(straddles & (px < x_cross), axis=1)
+            inside[start : start + step] = crossings % 2 == 1
+    return inside
+
+
+def join_points(index: PolygonIndex, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Código IBGE do município de cada ponto ('' quando nenhum contém o ponto)."""
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    result = np.full(len(lon), "", dtype=object)
+
+    cells = index.cells(lon, lat)
+    valid = np.flatnonzero(cells >= 0)
+    starts = index.cell_offsets[cells[valid]]
+    counts = index.cell_offsets[cells[valid] + 1] - starts
+    # Expande cada ponto em um par por município candidato da sua célula.
+    pair_points = np.repeat(valid, counts)
+    within_cell = np.arange(len(pair_points)) - np.repeat(np.cumsum(counts) - counts, counts)
+    pair_features = index.cell_features[np.repeat(starts, counts) + within_cell]
+
+    bboxes = index.bboxes[pair_features]
+    pair_lon = lon[pair_points]
+    pair_lat = lat[pair_points]
+    in_bbox = (
+        (pair_lon >= bboxes[:, 0])
+        & (pair_lon <= bboxes[:, 2])
+        & (pair_lat >= bboxes[:, 1])
+        & (pair_lat <= bboxes[:, 3])
+    )
+    pair_points = pair_points[in_bbox]
+    pair_features = pair_features[in_bbox]
+
+    if len(pair_points) == 0:
+        return result
+
+    order = np.argsort(pair_features, kind="stable")
+    pair_points = pair_points[order]
+    pair_features = pair_features[order]
+    block_starts = np.flatnonzero(np.r_[True, np.diff(pair_features) != 0])
+    block_ends = np.r_[block_starts[1:], len(pair_features)]
+    for block_start, block_end in zip(block_starts, block_ends):
+        feature = pair_features[block_start]
+        points = pair_points[block_start:block_end]
+        points = points[result[points] == ""]
+        if len(points) == 0:
+            continue
+        inside = _points_in_polygon(index.feature_edges(feature), lon[points], lat[points])
+        result[points[inside]] = index.codes[feature]
+    return result
+
+
+_WORKER_INDEX: PolygonIndex | None = None
+
+
+def _init_worker(index: PolygonIndex) -> None:
+    global _WORKER_INDEX
+    _WORKER_INDEX = index
+
+
+def _join_chunk(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    return join_points(_WORKER_INDEX, lon, lat)
+
+
+def join_points_parallel(
+    index: PolygonIndex, lon: np.ndarray, lat: np.ndarray, workers: int | None = None
+) -> np.ndarray:
+    """`join_points` em blocos de `JOIN_CHUNK_SIZE`, distribuídos entre processos."""
+    workers = workers or os.cpu_count() or 1
+    bounds = range(0, len(lon), JOIN_CHUNK_SIZE)
+    lon_chunks = [lon[start : start + JOIN_CHUNK_SIZE] for start in bounds]
+    lat_chunks = [lat[start : start + JOIN_CHUNK_SIZE] for start in bounds]
+    if not lon_chunks:
+        return np.empty(0, dtype=object)
+    if workers == 1 or len(lon_chunks) == 1:
+        results = [join_points(index, *chunk) for chunk in zip(lon_chunks, lat_chunks)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(lon_chunks)),
+            initializer=_init_worker,
+            initargs=(index,),
+        ) as executor:
+            results = list(executor.map(_join_chunk, lon_chunks, lat_chunks))
+    return np.concatenate(results)
+
+
+def sidecar_path(dataset_path: Path) -> Path:
+    name = dataset_path.stem if dataset_path.suffix else dataset_path.name
+    return dataset_path.parent / f"{name}.municipios.parquet"
+
+
+def _join_geojson_path(data_dir: Path, level: str | None) -> Path:
+    """Arquivo que `load_municipality_geojson` lê para `level` (variante ou malha completa)."""
+    variant = data_dir / geometry_filename(level)
+    return variant if variant.exists() else data_dir / GEOJSON_FILENAME
+
+
+def _sidecar_signature(repo: LocalFileRepository, geojson_path: Path) -> str:
+    geojson_stat = geojson_path.stat()
+    return json.dumps(
+        {
+            "dataset_version": list(repo.version()),
+            "geojson": [geojson_path.name, geojson_stat.st_size, geojson_stat.st_mtime_ns],
+        }
+    )
+
+
+def build_municipality_sidecar(
+    repo: LocalFileRepository,
+    data_dir: Path,
+    level: str | None = DEFAULT_JOIN_LEVEL,
+    workers: int | None = None,
+    prospects: pd.DataFrame | None = None,
+) -> pd.DataFrame:
+    """Calcula `municipio_ibge` de cada prospect e grava o parquet auxiliar.
+
+    `prospects` evita reler o dataset quando o chamador já tem `cnpj_cpf`,
+    `lat` e `long` em memória.
+    """
+    geojson_path = _join_geojson_path(data_dir, level)
+    index = build_polygon_index(load_municipality_geojson(data_dir, level=level))
+    if prospects is None:
+        prospects = repo.load(columns=["cnpj_cpf", "lat", "long"])
+    codes = join_points_parallel(
+        index,
+        pd.to_numeric(prospects["long"], errors="coerce").to_numpy(dtype=float),
+        pd.to_numeric(prospects["lat"], errors="coerce").to_numpy(dtype=float),
+        workers,
+    )
+
+    sidecar = pd.DataFrame(
+        {
+            "cnpj_cpf": prospects["cnpj_cpf"].astype(str).to_numpy(),
+            "municipio_ibge": np.where(codes == "", None, codes),
+        }
+    )
+    table = pa.Table.from_pandas(sidecar, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {SIDECAR_METADATA_KEY: _sidecar_signature(repo, geojson_path).encode("utf-8")}
+    )
+    path = sidecar_path(repo.file_path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    return sidecar
+
+
+def load_municipality_sidecar(
+    repo: LocalFileRepository, data_dir: Path, level: str | None = DEFAULT_JOIN_LEVEL
+) -> pd.DataFrame | None:
+    """Códigos IBGE já calculados, ou None se o parquet não existe ou está desatualizado."""
+    path = sidecar_path(repo.file_path)
+    geojson_path = _join_geojson_path(data_dir, level)
+    if not path.exists() or not geojson_path.exists():
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    signature = metadata.get(SIDECAR_METADATA_KEY, b"").decode("utf-8")
+    if signature != _sidecar_signature(repo, geojson_path):
+        return None
+    return pq.read_table(path).to_pandas()
+
+
+def attach_municipality_codes(df: pd.DataFrame, sidecar: pd.DataFrame) -> pd.DataFrame:
+    codes = sidecar.drop_duplicates("cnpj_cpf").set_index("cnpj_cpf")["municipio_ibge"]
+    df = df.copy(deep=False)
+    df["municipio_ibge"] = df["cnpj_cpf"].astype(str).map(codes)
+    return df
+
+
+def with_municipality_codes(
+    df: pd.DataFrame,
+    repo: LocalFileRepository,
+    data_dir: Path,
+    level: str | None = DEFAULT_JOIN_LEVEL,
+) -> pd.DataFrame:
+    """Acrescenta `municipio_ibge` lido do parquet auxiliar.
+
+    Só lê o arquivo gerado por `scripts/join_municipalities.py`; a junção não
+    roda aqui. Sem o arquivo, ou com ele desatualizado em relação ao dataset ou
+    ao GeoJSON, o DataFrame volta inalterado.
+    """
+    if "municipio_ibge" in df.columns or "cnpj_cpf" not in df.columns:
+        return df
+    sidecar = load_municipality_sidecar(repo, data_dir, level)
+    if sidecar is None:
+        return df
+    return attach_municipality_codes(df, sidecar)